@@ -1,39 +1,199 @@
 #!/usr/bin/python3
 
 import sys
-import operator
-
-# The filename is given as argument from the command line
-# eg. > python frequent_words_counter.py filename1.txt
-# The following command reads this argument
-filename = str(sys.argv[1])
-
-# Open the file for reading
-f = open(filename, 'r')
-
-# The first line is the text.  
-# Note: strip removes the hidden character for newline from the end of the line
-text = f.readline().strip()
-
-# The second line is the Kmer size K
-k = int(f.readline().strip())
-
-# Initialize a dictionary. Loop on the text and count kmers
-counts = {}
-for i in range(len(text) - k + 1):
-	kmer = text[i:i+k]
-	if kmer not in counts:
-		counts[kmer] = 0
-	counts[kmer] += 1
-
-# Find the maximum count
-max_count = max(counts.values())
-
-# Initialize a list to put the most frequent kmers
-most_frequent_kmers = []
-for kmer, count in counts.items():
-	if count == max_count:
-		most_frequent_kmers.append(kmer)
-
-# Print the list with the most frequent kmers using space as separator
-print(' '.join(most_frequent_kmers))
\ No newline at end of file
+import itertools
+import collections
+import multiprocessing
+import os
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.kmers import encode_sequence, decode_kmer, rolling_kmer_codes, indices_of_max
+
+# Up to this K the counts are kept in a dense array with 4^K counters, as long
+# as the array is not much larger than the text. Above it a dictionary of
+# packed integers is used.
+DENSE_MAX_K = 13
+
+def use_dense_counts(k, length):
+	"""
+	Decide whether the kmers of a text of the given length are counted in a
+	dense array of 4^k counters rather than in a dictionary.
+	"""
+	return k <= DENSE_MAX_K and 4 ** k <= 4 * length
+
+def count_kmers(encoded, k, dense=None):
+	"""
+	Count the kmers of size k in an encoded sequence.
+	Returns the counts, indexable by kmer code, and the maximum count.
+	"""
+	if dense is None:
+		dense = use_dense_counts(k, len(encoded))
+	if dense:
+		counts = array('I', bytes(4 ** k * array('I').itemsize))
+	else:
+		counts = collections.defaultdict(int)
+
+	max_count = 0
+	for pos, code in rolling_kmer_codes(encoded, k):
+		count = counts[code] + 1
+		counts[code] = count
+		if count > max_count:
+			max_count = count
+	return counts, max_count
+
+def first_occurring_codes(encoded, k, is_selected):
+	"""
+	Return the codes of the kmers of an encoded sequence for which is_selected
+	is true, without duplicates, in order of first occurrence.
+	"""
+	codes = []
+	reported = set()
+	for pos, code in rolling_kmer_codes(encoded, k):
+		if code not in reported and is_selected(code):
+			reported.add(code)
+			codes.append(code)
+	return codes
+
+def most_frequent_kmers(text, k, workers=1):
+	"""
+	Frequent Words Problem: Find the most frequent k-mers in a string.
+	Input: A string Text and an integer k.
+	Output: All most frequent k-mers in Text, in order of first occurrence.
+	"""
+	encoded = encode_sequence(text)
+	if workers > 1:
+		most_frequent_codes = most_frequent_codes_parallel(encoded, k, workers)
+		return [decode_kmer(code, k) for code in most_frequent_codes]
+
+	counts, max_count = count_kmers(encoded, k)
+	if max_count == 0:
+		return []
+
+	# Walk the text again to report the kmers in order of first occurrence
+	most_frequent_codes = first_occurring_codes(encoded, k, lambda code: counts[code] == max_count)
+
+	return [decode_kmer(code, k) for code in most_frequent_codes]
+
+def shards(encoded, k, workers):
+	"""
+	Split an encoded sequence into one shard per worker. Consecutive shards
+	overlap by k-1 nucleotides, so every kmer lies entirely in exactly one
+	shard: the one that contains its start position.
+	"""
+	kmers = len(encoded) - k + 1
+	if kmers <= 0:
+		return []
+	shard_kmers = -(-kmers // workers) # Ceiling division
+	return [encoded[start:start + shard_kmers + k - 1] for start in range(0, kmers, shard_kmers)]
+
+# Dense counts shared by the worker processes, and the lock that guards them
+_shared_counts = None
+_shared_counts_lock = None
+
+def _init_shard_worker(shared_counts, lock):
+	global _shared_counts, _shared_counts_lock
+	_shared_counts = shared_counts
+	_shared_counts_lock = lock
+
+def _count_shard(args):
+	'''
+	Count the kmers of a shard, in a dense array or a dictionary depending on
+	the length of the shard. With shared dense counts, the counts of the kmers
+	that occur in the shard are added there; otherwise they are returned as a
+	dictionary from code to count.
+	'''
+	(shard, k, shared) = args
+	counts, max_count = count_kmers(shard, k, use_dense_counts(k, len(shard)))
+	if not shared:
+		return dict(counts)
+
+	# The codes of the kmers of the shard are listed before taking the lock, so
+	# no 4^k scan runs under it
+	if isinstance(counts, array):
+		codes = list(itertools.compress(range(len(counts)), counts))
+	else:
+		codes = list(counts)
+	shared_counts = memoryview(_shared_counts).cast('B').cast('I')
+	with _shared_counts_lock:
+		for code in codes:
+			shared_counts[code] += counts[code]
+	return None
+
+def _first_occurring_codes_in_shard(args):
+	(shard, k, selected_codes) = args
+	return first_occurring_codes(shard, k, selected_codes.__contains__)
+
+def most_frequent_codes_parallel(encoded, k, workers):
+	'''
+	Count the kmers of the shards of an encoded sequence in worker processes and
+	merge the per-worker tables. Returns the codes of the most frequent kmers in
+	order of first occurrence, exactly as the single process counting does.
+	
+	Every worker counts its shard densely or sparsely depending on the length of
+	the shard. When the whole sequence is counted densely, the counts live in
+	shared memory, so every worker adds the kmers of its shard there and no
+	table of 4^k counters is sent between processes. Otherwise the kmers that
+	occur in each shard are sent back and merged by the main process.
+	'''
+	dense = use_dense_counts(k, len(encoded))
+	sequence_shards = shards(encoded, k, workers)
+	if not sequence_shards:
+		return []
+
+	shared_counts = multiprocessing.RawArray('I', 4 ** k if dense else 0)
+	lock = multiprocessing.Lock()
+	with multiprocessing.Pool(workers, _init_shard_worker, (shared_counts, lock)) as pool:
+		shard_tables = pool.map(_count_shard, [(shard, k, dense) for shard in sequence_shards])
+
+		if dense:
+			counts = array('I')
+			counts.frombytes(memoryview(shared_counts).cast('B'))
+			most_frequent_codes = set(indices_of_max(counts))
+		else:
+			counts = collections.defaultdict(int)
+			for shard_counts in shard_tables:
+				for code, count in shard_counts.items():
+					counts[code] += count
+			max_count = max(counts.values(), default=0)
+			most_frequent_codes = set(code for code, count in counts.items() if count == max_count)
+
+		# Order the most frequent kmers by first occurrence, shard after shard
+		shard_codes = pool.map(_first_occurring_codes_in_shard, [(shard, k, most_frequent_codes) for shard in sequence_shards])
+
+	ordered_codes = []
+	reported = set()
+	for codes in shard_codes:
+		for code in codes:
+			if code not in reported:
+				reported.add(code)
+				ordered_codes.append(code)
+	return ordered_codes
+
+def solve(filename, workers=1):
+	"""
+	Solve the problem for a dataset file and return the output text.
+	"""
+	# Open the file for reading
+	f = open(filename, 'r')
+
+	# The first line is the text.
+	# Note: strip removes the hidden character for newline from the end of the line
+	text = f.readline().strip()
+
+	# The second line is the Kmer size K
+	k = int(f.readline().strip())
+
+	# The most frequent kmers using space as separator
+	return ' '.join(most_frequent_kmers(text, k, workers))
+
+if __name__ == '__main__':
+	# The filename is given as argument from the command line
+	# eg. > python frequent_words_counter.py filename1.txt
+	# The following command reads this argument
+	filename = str(sys.argv[1])
+
+	# The number of worker processes can be given as a second argument
+	workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+	print(solve(filename, workers))
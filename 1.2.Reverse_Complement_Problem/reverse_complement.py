@@ -1,30 +1,149 @@
 #!/usr/bin/python3
 
 import sys
-import operator
+import os
 
-# Define a function to call later
-def reverse_complement(seq):
-	"""Return the reverse complement of a DNA string.""" 
-	
-	basecomplement = {'a':'t', 'c':'g', 't':'a', 'g':'c', 'A':'T', 'C':'G', 'T':'A', 'G':'C'}
-	reverse_seq = seq[::-1]
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.dna import IUPAC_CODES, COMPLEMENT_TABLE, reverse_complement
 
-	dna = '' # initialize the variable dna as an empty string
-	for nt in reverse_seq:
-		dna += basecomplement[nt] 
-	return dna
+# Usage:
+#   python reverse_complement.py dataset.txt
+#       Print the reverse complement of the sequence in the first line of the dataset.
+#   python reverse_complement.py --fasta input.fa output.fa
+#       Reverse complement every record of a (multi-line) FASTA file of any size.
 
+# Characters removed from the sequence lines of a FASTA file
+WHITESPACE = b' \t\r\n'
 
-# Get filename from the command arguments
-filename = str(sys.argv[1])
+# Size in bytes of the blocks read from the file in FASTA mode
+BLOCK_SIZE = 1 << 20
 
-# Open the file for reading
-f = open(filename, 'r')
+def fasta_records(f, block_size=BLOCK_SIZE):
+	"""
+	Scan a FASTA file forward in blocks and return one (header, start, end) per
+	record, where start and end are the file offsets of its sequence lines.
+	A file without headers is a single record with header None.
+	"""
+	records = []
+	header = None # Header of the current record
+	start = 0 # Offset of the sequence of the current record
+	pending_header = None # Part of a header line read so far
+	at_line_start = True
+	offset = 0
+	while True:
+		block = f.read(block_size)
+		if not block:
+			break
 
-# Get the first line of the file - the DNA sequence
-text = f.readline().strip()
+		pos = 0
+		while pos < len(block):
+			if pending_header is not None:
+				end = block.find(b'\n', pos)
+				if end < 0:
+					pending_header += block[pos:]
+					break
+				header = (pending_header + block[pos:end]).rstrip(b'\r')
+				pending_header = None
+				start = offset + end + 1
+				pos = end + 1
+				at_line_start = True
+				continue
 
-# Call the funtion we defined earlier
-revcom = reverse_complement(text)
-print(revcom)
\ No newline at end of file
+			if at_line_start and block[pos] == ord('>'):
+				header_start = pos
+			else:
+				header_start = block.find(b'\n>', pos)
+				if header_start < 0:
+					break
+				header_start += 1
+
+			# A new record starts: close the current one unless it is empty and headerless
+			if header is not None or offset + header_start > start:
+				records.append((header, start, offset + header_start))
+			pending_header = b'>'
+			pos = header_start + 1
+
+		at_line_start = block.endswith(b'\n')
+		offset += len(block)
+
+	if pending_header is not None:
+		header = pending_header.rstrip(b'\r')
+		start = offset
+	records.append((header, start, offset))
+	return records
+
+
+def _line_width(f, start, end):
+	"""
+	Return the length of the first sequence line of a record, or 0 if the
+	record is a single line.
+	"""
+	f.seek(start)
+	line = f.readline()
+	if start + len(line) >= end:
+		return 0
+	return len(line.rstrip(b'\r\n'))
+
+
+def reverse_complement_fasta(in_file, out_file, block_size=BLOCK_SIZE):
+	"""
+	Reverse complement every record of a FASTA file (binary file objects) without
+	loading it in memory. The sequence of each record is read in blocks backwards
+	from its end; every block is complemented with a translation table, reversed
+	and written forward, wrapped to the line width of the input record.
+	"""
+	for (header, start, end) in fasta_records(in_file, block_size):
+		if header is not None:
+			out_file.write(header + b'\n')
+		width = _line_width(in_file, start, end)
+
+		column = 0
+		pos = end
+		while pos > start:
+			block_start = max(start, pos - block_size)
+			in_file.seek(block_start)
+			block = in_file.read(pos - block_start).translate(None, WHITESPACE)
+			pos = block_start
+			if block.translate(None, IUPAC_CODES):
+				raise ValueError("Not a nucleotide or IUPAC code: " + repr(block.translate(None, IUPAC_CODES)[:1].decode()))
+			block = block.translate(COMPLEMENT_TABLE)[::-1]
+
+			if width == 0:
+				out_file.write(block)
+				column += len(block)
+				continue
+			i = 0
+			while i < len(block):
+				line = block[i:i + width - column]
+				out_file.write(line)
+				column += len(line)
+				i += len(line)
+				if column == width:
+					out_file.write(b'\n')
+					column = 0
+
+		if column > 0 or width == 0:
+			out_file.write(b'\n')
+
+
+def solve(filename):
+	"""
+	Solve the problem for a dataset file and return the output text.
+	"""
+	# Open the file for reading
+	f = open(filename, 'r')
+
+	# Get the first line of the file - the DNA sequence
+	text = f.readline().strip()
+
+	# Call the funtion we defined earlier
+	return reverse_complement(text)
+
+
+if __name__ == '__main__':
+	if sys.argv[1] == '--fasta':
+		with open(sys.argv[2], 'rb') as in_file, open(sys.argv[3], 'wb') as out_file:
+			reverse_complement_fasta(in_file, out_file)
+	else:
+		# Get filename from the command arguments
+		print(solve(str(sys.argv[1])))
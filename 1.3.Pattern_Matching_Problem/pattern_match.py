@@ -1,28 +1,285 @@
 #!/usr/bin/python3
 
 import sys
-import operator
+import os
+import mmap
+import struct
+from array import array
 
-# Get filename from the command arguments
-filename = str(sys.argv[1])
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.dna import read_sequence_chunks, CHUNK_SIZE
+from bio_algorithms.suffix_array import build_suffix_array
 
-# Open the file for reading
-f = open(filename, 'r')
+# Usage:
+#   python pattern_match.py dataset.txt
+#       Scan the sequence of the dataset for the pattern of the dataset.
+#   python pattern_match.py --build-index genome.txt genome.fmi
+#       Build an FM-index for a genome (plain sequence or FASTA) and save it.
+#   python pattern_match.py --query genome.fmi patterns.txt
+#       Load a saved index and print the positions of each pattern in the file, one line per pattern.
+#   python pattern_match.py --batch genome.txt patterns.txt
+#       Stream the genome once through an Aho-Corasick automaton of all the patterns in the
+#       file and print every hit as 'pattern position', one line per hit.
 
-# The first line in the file is the pattern
-pattern = f.readline().strip()
-pattern_length = len(pattern)
+# Layout of the index file. All sections start at a multiple of 8 bytes.
+#   header: magic, text length (with the '$' terminator), checkpoint interval, suffix array item size
+#   symbol_rank: 256 bytes mapping each byte to its index in the alphabet (255 if absent)
+#   first_column: 256 uint64, number of text characters smaller than each byte
+#   bwt: Burrows-Wheeler transform of the text
+#   checkpoints: uint64 occurrence counts of each alphabet symbol before every checkpoint
+#   suffix_array: the suffix array of the text
+INDEX_MAGIC = b'FMINDEX1'
+INDEX_HEADER = struct.Struct('<8sQQQ')
+CHECKPOINT_INTERVAL = 64
+TERMINATOR = b'$'
 
-# The second line is the file is the sequence
-sequence = f.readline().strip()
+def pattern_match_positions(pattern, sequence):
+	"""
+	Pattern Matching Problem: Find all occurrences of a pattern in a string.
+	Input: Two strings, Pattern and Genome.
+	Output: All starting positions where Pattern appears as a substring of Genome.
+	"""
+	pattern_positions = []
+	if not pattern:
+		return pattern_positions
+	i = sequence.find(pattern)
+	while i >= 0:
+		pattern_positions.append(i)
+		i = sequence.find(pattern, i + 1)
+	return pattern_positions
 
-# Loop on the sequence and check if pattern is found.
-# Before the loop initialize an array to store the positions found.
-pattern_positions = []
-for i in range(len(sequence) - pattern_length + 1):
-	kmer = sequence[i:i+pattern_length]
-	if kmer == pattern:
-		pattern_positions.append(str(i))
+def read_genome(filename):
+	"""
+	Read a genome from a file with either the plain sequence or FASTA records.
+	Header lines are skipped and the sequence lines are concatenated.
+	"""
+	with open(filename) as f:
+		return ''.join(line.strip() for line in f if not line.startswith('>'))
 
-# Print the list with the positions
-print(' '.join(pattern_positions))
\ No newline at end of file
+def read_genome_chunks(filename, chunk_size=CHUNK_SIZE):
+	"""
+	Read a genome from a file in blocks of chunk_size bytes and yield the
+	sequence characters of each block. Works both for a plain sequence and
+	for FASTA; header lines and line breaks are skipped.
+	"""
+	with open(filename, 'rb') as f:
+		for chunk in read_sequence_chunks(f, chunk_size):
+			yield chunk.decode('ascii')
+
+class AhoCorasickAutomaton:
+	'''
+	An Aho-Corasick automaton that finds all occurrences of a set of patterns
+	in a single pass over a text. The transitions are completed for every
+	character of the patterns, so each text character costs one dictionary lookup.
+	'''
+
+	def __init__(self, patterns):
+		self.patterns = list(dict.fromkeys(p for p in patterns if p)) # Distinct, in input order
+
+		# Trie of the patterns
+		transitions = [{}]
+		outputs = [()]
+		for index, pattern in enumerate(self.patterns):
+			state = 0
+			for nt in pattern:
+				if nt not in transitions[state]:
+					transitions.append({})
+					outputs.append(())
+					transitions[state][nt] = len(transitions) - 1
+				state = transitions[state][nt]
+			outputs[state] = (index,)
+
+		# Breadth-first pass: compute the failure links, complete the missing
+		# transitions through them and inherit the outputs of the failure state
+		alphabet = set(''.join(self.patterns))
+		failure = [0] * len(transitions)
+		queue = []
+		for nt in alphabet:
+			if nt in transitions[0]:
+				queue.append(transitions[0][nt])
+			else:
+				transitions[0][nt] = 0
+		for state in queue:
+			for nt in alphabet:
+				if nt in transitions[state]:
+					child = transitions[state][nt]
+					failure[child] = transitions[failure[state]][nt]
+					outputs[child] = outputs[child] + outputs[failure[child]]
+					queue.append(child)
+				else:
+					transitions[state][nt] = transitions[failure[state]][nt]
+
+		self.transitions = transitions
+		self.outputs = outputs
+
+	def find_all(self, chunks):
+		'''
+		Stream the text, given as an iterable of string chunks, through the
+		automaton and yield (pattern, position) for every occurrence, in order
+		of the position where the occurrence ends.
+		'''
+		transitions = self.transitions
+		outputs = self.outputs
+		state = 0
+		offset = 0
+		for chunk in chunks:
+			for i, nt in enumerate(chunk):
+				state = transitions[state].get(nt, 0)
+				if outputs[state]:
+					end = offset + i + 1
+					for index in outputs[state]:
+						pattern = self.patterns[index]
+						yield (pattern, end - len(pattern))
+			offset += len(chunk)
+
+def _pad(data):
+	"""
+	Pad a bytes-like object with zeros to a multiple of 8 bytes.
+	"""
+	return bytes(data) + bytes(-len(data) % 8)
+
+def build_fm_index(genome, index_filename, checkpoint_interval=CHECKPOINT_INTERVAL):
+	"""
+	Build the FM-index of a genome and write it to a file that can be memory-mapped.
+	"""
+	text = genome.encode('ascii') + TERMINATOR
+	n = len(text)
+	suffix_array = build_suffix_array(text)
+	bwt = bytes(text[i-1] for i in suffix_array)
+
+	alphabet = sorted(set(text))
+	symbol_rank = bytearray([255] * 256)
+	for index, symbol in enumerate(alphabet):
+		symbol_rank[symbol] = index
+
+	first_column = array('Q', [0] * 256)
+	smaller = 0
+	for symbol in alphabet:
+		first_column[symbol] = smaller
+		smaller += text.count(symbol)
+
+	checkpoints = array('Q')
+	totals = [0] * len(alphabet)
+	for start in range(0, n + 1, checkpoint_interval):
+		checkpoints.extend(totals)
+		block = bwt[start:start+checkpoint_interval]
+		for index, symbol in enumerate(alphabet):
+			totals[index] += block.count(symbol)
+
+	item_size = 4 if n < 2 ** 32 else 8
+	suffix_array = array('I' if item_size == 4 else 'Q', suffix_array)
+	if sys.byteorder != 'little':
+		first_column.byteswap()
+		checkpoints.byteswap()
+		suffix_array.byteswap()
+
+	with open(index_filename, 'wb') as f:
+		f.write(INDEX_HEADER.pack(INDEX_MAGIC, n, checkpoint_interval, item_size))
+		f.write(_pad(symbol_rank))
+		f.write(_pad(first_column.tobytes()))
+		f.write(_pad(bwt))
+		f.write(_pad(checkpoints.tobytes()))
+		f.write(_pad(suffix_array.tobytes()))
+
+class FMIndex:
+	'''
+	A memory-mapped FM-index of a genome, as written by build_fm_index.
+	Only the pages touched by the queries are read from disk.
+	'''
+
+	def __init__(self, index_filename):
+		with open(index_filename, 'rb') as f:
+			self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		view = memoryview(self.mapping)
+
+		(magic, self.length, self.checkpoint_interval, item_size) = INDEX_HEADER.unpack_from(view)
+		if magic != INDEX_MAGIC:
+			raise ValueError("Not an FM-index file: " + index_filename)
+		if sys.byteorder != 'little':
+			raise ValueError("FM-index files can only be loaded on little-endian machines")
+
+		offset = INDEX_HEADER.size
+		self.symbol_rank = bytes(view[offset:offset+256])
+		self.alphabet_size = 256 - self.symbol_rank.count(255)
+		offset += 256
+		self.first_column = view[offset:offset+256*8].cast('Q')
+		offset += 256 * 8
+		self.bwt = view[offset:offset+self.length]
+		offset += self.length + (-self.length % 8)
+		checkpoints_size = (self.length // self.checkpoint_interval + 1) * self.alphabet_size * 8
+		self.checkpoints = view[offset:offset+checkpoints_size].cast('Q')
+		offset += checkpoints_size
+		self.suffix_array = view[offset:offset+self.length*item_size].cast('I' if item_size == 4 else 'Q')
+
+	def occurrences_before(self, symbol, i):
+		'''
+		Return the number of occurrences of symbol in the BWT before position i.
+		Reads one checkpoint and counts at most checkpoint_interval characters.
+		'''
+		checkpoint = i // self.checkpoint_interval
+		start = checkpoint * self.checkpoint_interval
+		count = self.checkpoints[checkpoint * self.alphabet_size + self.symbol_rank[symbol]]
+		return count + self.bwt[start:i].tobytes().count(symbol)
+
+	def pattern_match_positions(self, pattern):
+		'''
+		Return the sorted positions of pattern in the genome. The backward
+		search narrows the suffix array range in one step per pattern character,
+		then the positions are read straight from the suffix array.
+		'''
+		pattern = pattern.encode('ascii')
+		if not pattern:
+			return []
+		low, high = 0, self.length
+		for symbol in reversed(pattern):
+			if self.symbol_rank[symbol] == 255:
+				return []
+			low = self.first_column[symbol] + self.occurrences_before(symbol, low)
+			high = self.first_column[symbol] + self.occurrences_before(symbol, high)
+			if low >= high:
+				return []
+		return sorted(self.suffix_array[low:high].tolist())
+
+def solve(filename):
+	"""
+	Solve the problem for a dataset file and return the output text.
+	"""
+	# Open the file for reading
+	f = open(filename, 'r')
+
+	# The first line in the file is the pattern
+	pattern = f.readline().strip()
+
+	# The second line is the file is the sequence
+	sequence = f.readline().strip()
+
+	# Find the positions where the pattern is found
+	pattern_positions = pattern_match_positions(pattern, sequence)
+
+	# The list with the positions
+	return ' '.join(map(str, pattern_positions))
+
+if __name__ == '__main__':
+	if sys.argv[1] == '--build-index':
+		# Build the index of a genome once and save it
+		build_fm_index(read_genome(sys.argv[2]), sys.argv[3])
+
+	elif sys.argv[1] == '--query':
+		# Answer every pattern of a file from a saved index
+		fm_index = FMIndex(sys.argv[2])
+		with open(sys.argv[3]) as f:
+			for line in f:
+				pattern = line.strip()
+				if pattern:
+					print(' '.join(map(str, fm_index.pattern_match_positions(pattern))))
+
+	elif sys.argv[1] == '--batch':
+		# Screen the genome for all the patterns of a file in one pass
+		with open(sys.argv[3]) as f:
+			automaton = AhoCorasickAutomaton(line.strip() for line in f)
+		for (pattern, position) in automaton.find_all(read_genome_chunks(sys.argv[2])):
+			print(pattern + ' ' + str(position))
+
+	else:
+		# Get filename from the command arguments
+		print(solve(str(sys.argv[1])))
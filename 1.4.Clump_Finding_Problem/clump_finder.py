@@ -10,42 +10,51 @@ def find_Kmers_forming_clumps (sequence, K, window, t):
 	"""
 	
 	Kmers_forming_clumps = set() # Create a set. Duplicate Kmers are auto-discarded
-	for i in range(len(sequence) - window + 1):
-		window_seq = sequence[i:i+window]
-		Kmers_forming_clumps.update(Kmers_found_more_than_t_times(sequence, K, t))
+	if len(sequence) < window or window < K:
+		return Kmers_forming_clumps
 
-	return Kmers_forming_clumps
-	
-def Kmers_found_more_than_t_times(sequence, K, t):
-	""" Find Kmers that are found at least t times in sequence """
-	
-	# Initialize a dictionary. Loop on the sequence and count Kmers
+	# Count the Kmers of the first window
 	counts = {}
-	for i in range(len(sequence) - K + 1):
+	for i in range(window - K + 1):
 		Kmer = sequence[i:i+K]
-		if Kmer not in counts:
-			counts[Kmer] = 0
-		counts[Kmer] += 1
-
-	# Initialize a list to put accepted Kmers
-	Kmers_more_than_t = []
+		counts[Kmer] = counts.get(Kmer, 0) + 1
 	for Kmer, count in counts.items():
 		if count >= t:
-			Kmers_more_than_t.append(Kmer)
-
-	return Kmers_more_than_t
+			Kmers_forming_clumps.add(Kmer)
+
+	# Slide the window by one position at a time. The Kmer at the start of the
+	# previous window leaves and the Kmer at the end of the new window enters.
+	# Only the entering Kmer can reach t, so it is the only one checked.
+	for i in range(1, len(sequence) - window + 1):
+		leaving_Kmer = sequence[i-1:i-1+K]
+		count = counts[leaving_Kmer] - 1
+		if count == 0:
+			del counts[leaving_Kmer]
+		else:
+			counts[leaving_Kmer] = count
+
+		entering_Kmer = sequence[i+window-K:i+window]
+		count = counts.get(entering_Kmer, 0) + 1
+		counts[entering_Kmer] = count
+		if count == t:
+			Kmers_forming_clumps.add(entering_Kmer)
 
+	return Kmers_forming_clumps
+	
+def solve(filename):
+	""" Solve the problem for a dataset file and return the output text """
+	
+	f = open(filename, 'r')
 
-# Get filename from the command arguments and open the file
-filename = str(sys.argv[1])
-f = open(filename, 'r')
+	# Get the data from the file
+	sequence = f.readline().strip()
+	(K, window, t) = map(int, f.readline().strip().split())
 
-# Get the data from the file
-sequence = f.readline().strip()
-(K, window, t) = map(int, f.readline().strip().split())
+	# Call the function that finds clumps
+	Kmers_forming_clumps = find_Kmers_forming_clumps(sequence, K, window, t)
 
-# Call the function that finds clumps
-Kmers_forming_clumps = find_Kmers_forming_clumps(sequence, K, window, t)
+	return ' '.join(Kmers_forming_clumps)
 
-# Print the results
-print(' '.join(Kmers_forming_clumps))
+if __name__ == '__main__':
+	# Get filename from the command arguments and print the results
+	print(solve(str(sys.argv[1])))
@@ -1,6 +1,17 @@
 #!/usr/bin/python3
 
 import sys
+import os
+import itertools
+import operator
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.dna import read_sequence_chunks, CHUNK_SIZE
+
+# Translate each nucleotide to its skew step plus one (G -> +1, C -> -1,
+# anything else -> 0), so the steps fit in unsigned bytes
+SKEW_STEP_TABLE = bytes(2 if chr(c) in 'Gg' else 0 if chr(c) in 'Cc' else 1 for c in range(256))
 
 def minimum_skew_positions (sequence):
 	"""
@@ -22,15 +33,163 @@ def minimum_skew_positions (sequence):
 	minimum_skew_pos = [i for i, skew in enumerate(skew_vector) if skew == min_skew]
 	
 	return minimum_skew_pos
-	
-# Get filename from the command arguments and open the file
-filename = str(sys.argv[1])
-f = open(filename, 'r')
 
-# Get the data from the file
-sequence = f.readline().strip()
+def skew_minimum_of_chunks(chunks):
+	"""
+	Compute the skew along a sequence given as chunks of bytes, starting from 0.
+	Returns the skew at the end, the minimum skew, its positions (from 0 to the
+	sequence length) and the sequence length.
+
+	The skew of every chunk is computed with a cumulative sum that starts at
+	the skew reached at the end of the previous chunk. Only the current minimum
+	and its positions are kept, so memory does not depend on the sequence size.
+	"""
+
+	min_skew = 0
+	minimum_skew_pos = [0]
+	offset = 0 # Skew at the end of the previous chunk
+	length = 0 # Number of nucleotides in the previous chunks
+	for chunk in chunks:
+		# The cumulative sum of (step + 1) minus the prefix length is the skew
+		steps = chunk.translate(SKEW_STEP_TABLE)
+		skews = list(map(operator.sub, itertools.accumulate(steps, initial=offset), range(len(steps) + 1)))
+		skews[0] = skews[1] # The chunk start was already reported by the previous chunk
+
+		chunk_min = min(skews)
+		if chunk_min < min_skew:
+			min_skew = chunk_min
+			minimum_skew_pos = []
+		if chunk_min == min_skew:
+			i = skews.index(chunk_min, 1)
+			while True:
+				minimum_skew_pos.append(length + i)
+				try:
+					i = skews.index(chunk_min, i + 1)
+				except ValueError:
+					break
+
+		offset = skews[-1]
+		length += len(steps)
 
-# Call the function that finds clumps
-minimum_skew_pos = minimum_skew_positions(sequence)
+	return (offset, min_skew, minimum_skew_pos, length)
+
+def minimum_skew_positions_streaming(f, chunk_size=CHUNK_SIZE):
+	"""
+	Minimum Skew Problem for genomes that do not fit in memory.
+	Input: A binary file object with the genome (plain or FASTA).
+	Output: All integer(s) i minimizing Skew(Prefixi (Text)), same as minimum_skew_positions.
+	"""
+
+	(skew, min_skew, minimum_skew_pos, length) = skew_minimum_of_chunks(read_sequence_chunks(f, chunk_size))
+	return minimum_skew_pos
+
+def header_spans(filename, chunk_size=CHUNK_SIZE):
+	"""
+	Return the (start, end) file offsets of the FASTA header lines of a file,
+	including their line break.
+	"""
+	spans = []
+	with open(filename, 'rb') as f:
+		offset = 0
+		previous = b'\n'
+		while True:
+			block = f.read(chunk_size)
+			if not block:
+				break
+			starts = []
+			if previous == b'\n' and block[:1] == b'>':
+				starts.append(0)
+			i = block.find(b'\n>')
+			while i >= 0:
+				starts.append(i + 1)
+				i = block.find(b'\n>', i + 1)
+			for start in starts:
+				if spans and offset + start < spans[-1][1]:
+					continue # '>' inside a header line
+				f.seek(offset + start)
+				line = f.readline()
+				spans.append((offset + start, offset + start + len(line)))
+			previous = block[-1:]
+			offset += len(block)
+			f.seek(offset)
+	return spans
+
+def read_range_chunks(filename, start, end, skipped_spans, chunk_size=CHUNK_SIZE):
+	"""
+	Read the bytes [start, end) of a file in chunks of at most chunk_size bytes,
+	leaving out the skipped (start, end) spans and whitespace.
+	"""
+	with open(filename, 'rb') as f:
+		pos = start
+		for (span_start, span_end) in skipped_spans + [(end, end)]:
+			span_start = max(span_start, start)
+			f.seek(pos)
+			while pos < min(span_start, end):
+				chunk = f.read(min(chunk_size, span_start - pos))
+				pos += len(chunk)
+				chunk = chunk.translate(None, b' \t\r\n')
+				if chunk:
+					yield chunk
+			pos = max(pos, min(span_end, end))
+
+def _block_skew_minimum(args):
+	(filename, start, end, skipped_spans, chunk_size) = args
+	return skew_minimum_of_chunks(read_range_chunks(filename, start, end, skipped_spans, chunk_size))
+
+def minimum_skew_positions_parallel(filename, workers, chunk_size=CHUNK_SIZE):
+	"""
+	Minimum Skew Problem with the genome file split in one block per worker.
+	Input: The name of a file with the genome (plain or FASTA) and the number of workers.
+	Output: All integer(s) i minimizing Skew(Prefixi (Text)), same as minimum_skew_positions.
+
+	Every worker computes the skew of its block starting from 0, its local
+	minimum and the positions of the local minimum. The skew at the start of a
+	block is the sum of the skews at the end of all the previous blocks, so a
+	second pass adds these prefix offsets and keeps the global minimum.
+	"""
+
+	size = os.path.getsize(filename)
+	spans = header_spans(filename, chunk_size)
+	boundaries = [size * i // workers for i in range(workers + 1)]
+	jobs = []
+	for (start, end) in zip(boundaries, boundaries[1:]):
+		block_spans = [(s, e) for (s, e) in spans if s < end and e > start]
+		jobs.append((filename, start, end, block_spans, chunk_size))
+	with multiprocessing.Pool(workers) as pool:
+		blocks = pool.map(_block_skew_minimum, jobs)
+
+	min_skew = 0
+	minimum_skew_pos = [0]
+	offset = 0 # Skew at the start of the block
+	length = 0 # Number of nucleotides before the block
+	for (block_skew, block_min, block_pos, block_length) in blocks:
+		if block_pos and block_pos[0] == 0:
+			block_pos = block_pos[1:] # Already reported as the end of the previous block
+		if block_pos:
+			if offset + block_min < min_skew:
+				min_skew = offset + block_min
+				minimum_skew_pos = []
+			if offset + block_min == min_skew:
+				minimum_skew_pos.extend(length + i for i in block_pos)
+		offset += block_skew
+		length += block_length
+
+	return minimum_skew_pos
+
+def solve(filename, workers=1):
+	"""
+	Solve the problem for a dataset file and return the output text.
+	"""
+	if workers > 1:
+		minimum_skew_pos = minimum_skew_positions_parallel(filename, workers)
+	else:
+		# Stream the genome from the file and find the minimum skew positions
+		with open(filename, 'rb') as f:
+			minimum_skew_pos = minimum_skew_positions_streaming(f)
+	
+	return ' '.join(map(str,minimum_skew_pos))
 
-print(' '.join(map(str,minimum_skew_pos)))
+if __name__ == '__main__':
+	# Get filename and optionally the number of worker processes from the command arguments
+	workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+	print(solve(str(sys.argv[1]), workers))
@@ -1,45 +1,31 @@
 #!/usr/bin/python3
 
 import sys
+import os
 
-def approximate_pattern_match_positions(pattern, sequence, d):
-	"""
-	Approximate Pattern Matching Problem: Find all approximate occurrences of a pattern in a string.
-	   Input: Two strings Pattern and Text along with an integer d.
-	   Output: All positions where Pattern appears in Text with at most d mismatches.
-	"""
-	
-	pattern_length = len(pattern)
-	pattern_positions = []
-	for i in range(len(sequence) - pattern_length + 1):
-		kmer = sequence[i:i+pattern_length]
-		if edit_distance(pattern, kmer) <= d:
-			pattern_positions.append(str(i))
-			
-	return pattern_positions
-
-
-def edit_distance(pattern1, pattern2):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.dna import approximate_pattern_match_positions
+
+def solve(filename, backend='bitvector'):
 	"""
-	Compare two patterns and calculate edit distance - the number of mismatches between the sequences
+	Solve the problem for a dataset file and return the output text.
 	"""
-	
-	edit_distance = 0
-	for i, nt in enumerate(pattern1):
-		if (nt != pattern2[i]):
-			edit_distance += 1
-	
-	return edit_distance
-
-# Get filename from the command arguments and open the file
-filename = str(sys.argv[1])
-f = open(filename, 'r')
-
-# The first line in the file is the pattern
-pattern = f.readline().strip()
-sequence = f.readline().strip()
-allowed_mismatches = int(f.readline().strip())
-
-# Call function to calculate approximate pattern positions
-pattern_positions = approximate_pattern_match_positions(pattern, sequence, allowed_mismatches)
-print(' '.join(pattern_positions))
\ No newline at end of file
+	f = open(filename, 'r')
+
+	# The first line in the file is the pattern
+	pattern = f.readline().strip()
+	sequence = f.readline().strip()
+	allowed_mismatches = int(f.readline().strip())
+
+	# Call function to calculate approximate pattern positions
+	pattern_positions = approximate_pattern_match_positions(pattern, sequence, allowed_mismatches, backend)
+	return ' '.join(pattern_positions)
+
+if __name__ == '__main__':
+	# Get filename from the command arguments
+	filename = str(sys.argv[1])
+
+	# Optionally get the matching backend from the command arguments
+	backend = sys.argv[2] if len(sys.argv) > 2 else 'bitvector'
+
+	print(solve(filename, backend))
@@ -1,82 +1,48 @@
 #!/usr/bin/python3
 
 import sys
+import os
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.kmers import ENCODING_TABLE, decode_kmer, neighborhood, rolling_kmer_codes, indices_of_max
 
 def frequent_words_with_mismatches_and_reverse_complement(sequence, k, d):
 	"""
 	Frequent Words with Mismatches Problem: Find the most frequent k-mers with mismatches in a string.
 	Input: A string Text as well as integers k and d. (You may assume k ≤ 12 and d ≤ 3.)
 	Output: All most frequent k-mers with up to d mismatches in Text.
-	"""
-	
-	kmer_counts = {}
-	for i in range(len(sequence) - k + 1):
-		kmer = sequence[i:i+k]
-		kmer_revcomp = reverse_complement(kmer)
-		if kmer not in kmer_counts:
-			kmer_counts[kmer] = len(approximate_pattern_match_positions(kmer, sequence, d))
-			kmer_counts[kmer] += len(approximate_pattern_match_positions(kmer_revcomp, sequence, d))
-			kmer_counts[kmer_revcomp] = kmer_counts[kmer]
-	
-	max_count = max(kmer_counts.values())
 	
-	most_frequent_kmers = []
-	for kmer, count in kmer_counts.items():
-		if count == max_count:
-			most_frequent_kmers.append(kmer)
-	
-	return most_frequent_kmers
-
-
-def approximate_pattern_match_positions(pattern, sequence, d):
-	"""
-	Approximate Pattern Matching Problem: Find all approximate occurrences of a pattern in a string.
-	   Input: Two strings Pattern and Text along with an integer d.
-	   Output: All positions where Pattern appears in Text with at most d mismatches.
+	The text is scanned once. Every kmer of the text adds one to the count of each
+	kmer in its d-neighborhood and in the d-neighborhood of its reverse complement.
+	The neighborhood of the reverse complement holds exactly the reverse complements
+	of the neighbors, so a kmer ends up counted once for each approximate occurrence
+	of itself or of its reverse complement in the text.
 	"""
 	
-	pattern_length = len(pattern)
-	pattern_positions = []
-	for i in range(len(sequence) - pattern_length + 1):
-		kmer = sequence[i:i+pattern_length]
-		if edit_distance(pattern, kmer) <= d:
-			pattern_positions.append(str(i))
-			
-	return pattern_positions
-
+	counts = array('I', bytes(4 ** k * array('I').itemsize))
+	for pos, code, revcomp_code in rolling_kmer_codes(sequence.encode('ascii').translate(ENCODING_TABLE), k, reverse_complement=True):
+		for neighbor in neighborhood(code, k, d):
+			counts[neighbor] += 1
+		for neighbor in neighborhood(revcomp_code, k, d):
+			counts[neighbor] += 1
+	
+	return [decode_kmer(code, k) for code in indices_of_max(counts)]
 
-def edit_distance(pattern1, pattern2):
+def solve(filename):
 	"""
-	Compare two patterns and calculate edit distance - the number of mismatches between the sequences
+	Solve the problem for a dataset file and return the output text.
 	"""
-	
-	edit_distance = 0
-	for i, nt in enumerate(pattern1):
-		if (nt != pattern2[i]):
-			edit_distance += 1
-	
-	return edit_distance
-
-# Define a function to call later
-def reverse_complement(seq):
-	"""Return the reverse complement of a DNA string.""" 
-	
-	basecomplement = {'a':'t', 'c':'g', 't':'a', 'g':'c', 'A':'T', 'C':'G', 'T':'A', 'G':'C'}
-	reverse_seq = seq[::-1]
-	
-	dna = '' # initialize the variable dna as an empty string
-	for nt in reverse_seq:
-		dna += basecomplement[nt] 
-	return dna
+	f = open(filename, 'r')
 
-# Get filename from the command arguments and open the file
-filename = str(sys.argv[1])
-f = open(filename, 'r')
+	# Get the data from the file
+	sequence = f.readline().strip()
+	(pattern_width, allowed_mismatches) = map(int, f.readline().strip().split())
 
-# Get the data from the file
-sequence = f.readline().strip()
-(pattern_width, allowed_mismatches) = map(int, f.readline().strip().split())
+	# Call function to calculate the most frequent kmers with mismatches and reverse complements
+	most_frequent_kmers = frequent_words_with_mismatches_and_reverse_complement(sequence, pattern_width, allowed_mismatches)
+	return ' '.join(most_frequent_kmers)
 
-# Call function to calculate approximate pattern positions
-most_frequent_kmers = frequent_words_with_mismatches_and_reverse_complement(sequence, int(pattern_width), int(allowed_mismatches))
-print(' '.join(most_frequent_kmers))
\ No newline at end of file
+if __name__ == '__main__':
+	# Get filename from the command arguments
+	print(solve(str(sys.argv[1])))
@@ -1,33 +1,31 @@
+#!/usr/bin/python3
+
 # Protein Translation Problem: Translate an RNA string into an amino acid string.
 # Input: An RNA string Pattern.
 # Output: The translation of Pattern into an amino acid string Peptide.
 
-# python ex1.py ex1.txt RNA_codon_table_1.txt
+# python protein_translator.py dataset_18_3.txt ../data/RNA_codon_table_1.txt
+# The sequence can also be a long RNA or DNA sequence, plain or FASTA; it is read in chunks.
 
 import sys
+import os
 
-rna_file = sys.argv[1]
-codon_table_file = sys.argv[2]
-
-rna_txt = open(rna_file)
-rna_seq = rna_txt.readline().strip()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.tables import create_codon_dictionary_from_file
+from bio_algorithms.dna import read_sequence_chunks
+from bio_algorithms.proteins import CodonTable
 
-codon_dictionary = {}
-with open(codon_table_file) as f:
-	for line in f:
-		if " \n" in line:
-			triplet = line.strip()
-			codon_dictionary[triplet] = "stop"
-		else:
-			(triplet, aa) = line.strip().split(" ")
-			codon_dictionary[triplet] = aa
+def solve(rna_file, codon_dictionary):
+	'''
+	Solve the problem for a dataset file and return the output text.
+	'''
+	codon_table = CodonTable(codon_dictionary)
+	with open(rna_file, 'rb') as f:
+		return ''.join(codon_table.translate_chunks(read_sequence_chunks(f)))
 
-protein = ''
-for i in xrange(0,len(rna_seq)-2,3):
-	codon = rna_seq[i:i+3]
-	if codon_dictionary[codon] != "stop":
-		protein += codon_dictionary[codon]
-	else:
-		break
+if __name__ == '__main__':
+	rna_file = sys.argv[1]
+	codon_table_file = sys.argv[2]
 
-print protein
+	codon_dictionary = create_codon_dictionary_from_file(codon_table_file)
+	print(solve(rna_file, codon_dictionary))
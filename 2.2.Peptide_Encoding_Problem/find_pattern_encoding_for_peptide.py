@@ -1,45 +1,42 @@
 #!/usr/bin/python3
 
 import sys
+import os
+import mmap
+import struct
+import bisect
+from array import array
 
-def create_codon_dictionary_from_file(filename):
-	codon_dictionary = {}
-	with open(filename) as f:
-		for line in f:
-			if " \n" in line:
-				triplet = line.strip()
-				codon_dictionary[triplet] = "stop"
-				triplet = triplet.replace("U", "T")
-				codon_dictionary[triplet] = "stop"
-			else:
-				(triplet, aa) = line.strip().split(" ")
-				codon_dictionary[triplet] = aa
-				triplet = triplet.replace("U", "T")
-				codon_dictionary[triplet] = aa
-	return codon_dictionary
-
-def translate_to_protein(rna, codon_dictionary):
-	protein = ''
-	for i in range(0, len(rna)-2, 3):
-		codon = rna[i:i+3]
-		if codon_dictionary[codon] != "stop":
-			protein += codon_dictionary[codon]
-		else:
-			break
-	return protein
-
-def reverse_complement(seq):
-	"""Return the reverse complement of a DNA string.""" 
-	
-	basecomplement = {'a':'t', 'c':'g', 't':'a', 'g':'c', 'u':'a', 'A':'T', 'C':'G', 'T':'A', 'G':'C', 'U':'A'}
-	reverse_seq = seq[::-1]
-
-	dna = '' # initialize the variable dna as an empty string
-	for nt in reverse_seq:
-		dna += basecomplement[nt] 
-	return dna
-
-def patterns_encoding_for_peptide_in_rna(rna, peptide):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.dna import reverse_complement, read_sequence_chunks
+from bio_algorithms.tables import create_codon_dictionary_from_file
+from bio_algorithms.proteins import translate_to_protein, CodonTable
+from bio_algorithms.suffix_array import build_suffix_array
+
+# Usage:
+#   python find_pattern_encoding_for_peptide.py dataset.txt codon_table.txt [frames|windows]
+#       Print the substrings of the dataset genome encoding the dataset peptide.
+#   python find_pattern_encoding_for_peptide.py --build-index genome.txt genome.pti codon_table.txt
+#       Translate the six reading frames of a genome (plain sequence or FASTA) once,
+#       index them with a suffix array and save the index.
+#   python find_pattern_encoding_for_peptide.py --query genome.pti peptides.txt
+#       Load a saved index and print the substrings of the genome encoding each peptide
+#       of the file (forward strand hits first, as for a single peptide), as 'peptide substring'.
+
+# Layout of the index file. All sections start at a multiple of 8 bytes.
+#   header: magic, genome length, length of the translated text, suffix array item size
+#   frame_starts: 6 uint64, offset of each frame in the translated text (3 forward, then 3 reverse complement)
+#   genome: the DNA sequence
+#   text: the six translated frames, each followed by FRAME_SEPARATOR
+#   suffix_array: the suffix array of the text
+INDEX_MAGIC = b'PEPINDX1'
+INDEX_HEADER = struct.Struct('<8sQQQ')
+FRAME_SEPARATOR = b'#'
+
+# Letters a peptide can be made of; the stop, invalid codon and frame separator letters never match
+AMINO_ACID_LETTERS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def patterns_encoding_for_peptide_in_rna(rna, peptide, codon_dictionary):
 	patterns_encoding_for_peptide = []
 	for i in range(len(rna) - 3*len(peptide) + 1):
 		rna_part = rna[i:i+3*len(peptide)]
@@ -48,21 +45,207 @@ def patterns_encoding_for_peptide_in_rna(rna, peptide):
 			patterns_encoding_for_peptide.append(rna_part)
 	return patterns_encoding_for_peptide
 
+def peptide_positions_in_frames(rna, peptide, codon_table):
+	'''
+	Return the sorted positions of rna where a substring encoding the peptide starts.
+	The three reading frames are translated once and the peptide is searched
+	in each translation; a hit at codon j of frame f starts at f + 3 * j.
+	Codons with an invalid nucleotide (e.g. N) translate to a letter that no
+	peptide matches, so they are skipped instead of failing the search.
+
+	>>> codon_table = CodonTable(create_codon_dictionary_from_file())
+	>>> peptide_positions_in_frames('AUNCCCAAA', 'QP', codon_table)
+	[]
+	>>> peptide_positions_in_frames('AUNCCCAAA', 'PK', codon_table)
+	[3]
+	'''
+	peptide = peptide.encode('ascii')
+	positions = []
+	if not peptide or peptide.strip(AMINO_ACID_LETTERS):
+		return positions
+	for (frame, protein) in enumerate(codon_table.translate_frames(rna.encode('ascii'))):
+		j = protein.find(peptide)
+		while j >= 0:
+			positions.append(frame + 3 * j)
+			j = protein.find(peptide, j + 1)
+	positions.sort()
+	return positions
+
+def patterns_encoding_for_peptide_by_frames(dna, peptide, codon_table):
+	'''
+	Peptide Encoding Problem in linear time: the same substrings of dna, in the
+	same order, as the window by window search of both strands. Hits on the
+	reverse complement strand are mapped back to the forward strand, so the
+	reverse complement of every pattern is a substring of dna.
+	'''
+	length = 3 * len(peptide)
+	patterns_encoding_for_peptide = [dna[i:i+length] for i in peptide_positions_in_frames(dna, peptide, codon_table)]
+	for i in peptide_positions_in_frames(reverse_complement(dna), peptide, codon_table):
+		patterns_encoding_for_peptide.append(dna[len(dna)-i-length:len(dna)-i])
+	return patterns_encoding_for_peptide
+
+def build_translated_index(dna, codon_table, index_filename):
+	'''
+	Translate the six reading frames of a genome, build the suffix array of the
+	translations and write the index to a file that can be memory-mapped.
+	'''
+	genome = dna.encode('ascii')
+	frames = codon_table.translate_frames(genome) + codon_table.translate_frames(reverse_complement(dna).encode('ascii'))
+	frame_starts = array('Q')
+	text = bytearray()
+	for protein in frames:
+		frame_starts.append(len(text))
+		text += protein + FRAME_SEPARATOR
+	text = bytes(text)
+	n = len(text)
+
+	item_size = 4 if n < 2 ** 32 else 8
+	suffix_array = array('I' if item_size == 4 else 'Q', build_suffix_array(text))
+	if sys.byteorder != 'little':
+		frame_starts.byteswap()
+		suffix_array.byteswap()
+
+	with open(index_filename, 'wb') as f:
+		f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(genome), n, item_size))
+		f.write(frame_starts.tobytes())
+		for section in (genome, text, suffix_array.tobytes()):
+			f.write(section)
+			f.write(bytes(-len(section) % 8))
+
+class TranslatedGenomeIndex:
+	'''
+	A memory-mapped six-frame translated index of a genome, as written by
+	build_translated_index. Every peptide is located with a binary search
+	over the suffix array of the translated frames.
+
+	>>> import tempfile
+	>>> codon_table = CodonTable(create_codon_dictionary_from_file())
+	>>> with tempfile.TemporaryDirectory() as directory:
+	...     index_filename = os.path.join(directory, 'genome.pti')
+	...     build_translated_index('ATNCCCAAA', codon_table, index_filename)
+	...     index = TranslatedGenomeIndex(index_filename)
+	...     (index.patterns_encoding_for_peptide('QP'), index.patterns_encoding_for_peptide('PK'))
+	([], ['CCCAAA'])
+	'''
+
+	def __init__(self, index_filename):
+		with open(index_filename, 'rb') as f:
+			self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		view = memoryview(self.mapping)
+
+		(magic, self.genome_length, self.length, item_size) = INDEX_HEADER.unpack_from(view)
+		if magic != INDEX_MAGIC:
+			raise ValueError("Not a translated genome index file: " + index_filename)
+		if sys.byteorder != 'little':
+			raise ValueError("Translated genome index files can only be loaded on little-endian machines")
+
+		offset = INDEX_HEADER.size
+		self.frame_starts = view[offset:offset+6*8].cast('Q').tolist()
+		offset += 6 * 8
+		self.genome_start = offset
+		offset += self.genome_length + (-self.genome_length % 8)
+		self.text_start = offset
+		offset += self.length + (-self.length % 8)
+		self.suffix_array = view[offset:offset+self.length*item_size].cast('I' if item_size == 4 else 'Q')
+
+	def _prefix(self, suffix, size):
+		start = self.text_start + suffix
+		return self.mapping[start:start+size]
+
+	def suffix_range(self, peptide):
+		'''
+		Return the range [low, high) of the suffix array with the suffixes of the
+		translated text that start with peptide (a bytes string).
+		'''
+		size = len(peptide)
+		low, high = 0, self.length
+		while low < high:
+			middle = (low + high) // 2
+			if self._prefix(self.suffix_array[middle], size) < peptide:
+				low = middle + 1
+			else:
+				high = middle
+		start = low
+		high = self.length
+		while low < high:
+			middle = (low + high) // 2
+			if self._prefix(self.suffix_array[middle], size) <= peptide:
+				low = middle + 1
+			else:
+				high = middle
+		return (start, low)
+
+	def patterns_encoding_for_peptide(self, peptide):
+		'''
+		Return the substrings of the genome encoding the peptide, in the same
+		order as patterns_encoding_for_peptide_by_frames.
+		'''
+		length = 3 * len(peptide)
+		peptide = peptide.encode('ascii')
+		if not peptide or peptide.strip(AMINO_ACID_LETTERS):
+			return []
+
+		hits = []
+		(low, high) = self.suffix_range(peptide)
+		for suffix in self.suffix_array[low:high]:
+			frame = bisect.bisect_right(self.frame_starts, suffix) - 1
+			# Position of the hit on its own strand
+			position = frame % 3 + 3 * (suffix - self.frame_starts[frame])
+			hits.append((frame // 3, position))
+		hits.sort()
+
+		patterns = []
+		for (strand, position) in hits:
+			if strand == 1:
+				position = self.genome_length - position - length
+			start = self.genome_start + position
+			patterns.append(self.mapping[start:start+length].decode('ascii'))
+		return patterns
+
+def solve(dataset_file, codon_dictionary, mode='frames'):
+	'''
+	Solve the problem for a dataset file and return the output text.
+	The mode is 'frames' (translate each reading frame once) or 'windows'
+	(translate every window of the strands).
+	'''
+	f = open(dataset_file)
+	dna = f.readline().strip()
+	peptide = f.readline().strip()
+
+	if mode == 'frames':
+		return "\n".join(patterns_encoding_for_peptide_by_frames(dna, peptide, CodonTable(codon_dictionary)))
 
-dataset_file = sys.argv[1]
-codon_table_file = sys.argv[2]
+	rev_comp_dna = reverse_complement(dna)
 
-f = open(dataset_file)
-dna = f.readline().strip()
-peptide = f.readline().strip()
+	patterns_encoding_for_peptide = patterns_encoding_for_peptide_in_rna(dna, peptide, codon_dictionary)
+	for pattern in patterns_encoding_for_peptide_in_rna(rev_comp_dna, peptide, codon_dictionary):
+		patterns_encoding_for_peptide.append(reverse_complement(pattern))
+	return "\n".join(patterns_encoding_for_peptide)
 
-rev_comp_dna = reverse_complement(dna)
-codon_dictionary = create_codon_dictionary_from_file(codon_table_file)
+if __name__ == '__main__':
+	if sys.argv[1] == '--build-index':
+		# Translate and index a genome once and save the index
+		with open(sys.argv[2], 'rb') as f:
+			dna = b''.join(read_sequence_chunks(f)).decode('ascii')
+		codon_table = CodonTable(create_codon_dictionary_from_file(sys.argv[4]))
+		build_translated_index(dna, codon_table, sys.argv[3])
+		sys.exit()
 
-patterns_encoding_for_peptide = patterns_encoding_for_peptide_in_rna(dna, peptide)
-for pattern in patterns_encoding_for_peptide_in_rna(rev_comp_dna, peptide):
-	patterns_encoding_for_peptide.append(reverse_complement(pattern))
-print ("\n".join(patterns_encoding_for_peptide))
+	if sys.argv[1] == '--query':
+		# Answer every peptide of a file from a saved index
+		index = TranslatedGenomeIndex(sys.argv[2])
+		with open(sys.argv[3]) as f:
+			for line in f:
+				peptide = line.strip()
+				for pattern in index.patterns_encoding_for_peptide(peptide):
+					print(peptide + ' ' + pattern)
+		sys.exit()
 
+	dataset_file = sys.argv[1]
+	codon_table_file = sys.argv[2]
 
+	# Optionally get the search mode from the command arguments
+	mode = sys.argv[3] if len(sys.argv) > 3 else 'frames'
 
+	codon_dictionary = create_codon_dictionary_from_file(codon_table_file)
+	print (solve(dataset_file, codon_dictionary, mode))
@@ -1,29 +1,46 @@
 #!/usr/bin/python3
 
 import sys
+import os
+import mmap
+import struct
+import itertools
+import multiprocessing
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.tables import create_mass_dictionary_from_file
+from bio_algorithms.spectra import cyclic_spectrum, cyclic_spectrum_array, linear_spectrum_array
+
+# Usage:
+#   python theoretical_spectrum.py dataset.txt mass_table.txt
+#       Print the cyclic spectrum of the peptide of the dataset.
+#   python theoretical_spectrum.py --batch peptides.txt spectra.bin mass_table.txt [cyclic|linear] [workers]
+#       Compute the spectra of all the peptides of a file, one per line, and
+#       write them to a binary spectra file that can be memory-mapped.
+
+# Layout of the spectra file. All sections start at a multiple of 8 bytes.
+#   header: magic, number of spectra, total number of masses
+#   masses: int64 masses of all the spectra, one spectrum after the other
+#   offsets: uint64 offset of each spectrum in masses, plus the total number of masses
+SPECTRA_MAGIC = b'SPECTRA1'
+SPECTRA_HEADER = struct.Struct('<8sQQ')
+
+# Number of peptides sent to a worker process at a time
+BATCH_SIZE = 1024
+
+SPECTRUM_FUNCTIONS = {
+	'cyclic': cyclic_spectrum_array,
+	'linear': linear_spectrum_array,
+}
 
 def create_theoretical_spectrum(peptide, mass_table):
-	theoretical_spectrum = [0, peptide_mass(peptide, mass_table)]
-	for i in range(len(peptide)):
-		for width in range(1,len(peptide)):
-			fragment = extract_fragment_from_cyclic_seq(peptide, width, i)
-			fragment_mass = peptide_mass(fragment, mass_table)
-			theoretical_spectrum.append(fragment_mass)
-	theoretical_spectrum.sort()
-	return theoretical_spectrum
-
-def extract_fragment_from_cyclic_seq(seq, fragment_width, from_pos):
-	'''
-	Given a linear seq representing a cyclic seq, extract a sequence fragment
-	of given length starting at a given position
-	'''
-	fragment = ''
-	for i in range(from_pos, from_pos+fragment_width):
-		if i < len(seq):
-			fragment += seq[i]
-		else:
-			fragment += seq[i-len(seq)]
-	return fragment
+	'''
+	Generate the theoretical spectrum of a cyclic peptide from the differences
+	of its prefix masses. Returns the sorted masses as a list; use --batch for
+	spectra stored as compact integer arrays.
+	'''
+	return cyclic_spectrum([mass_table[aa] for aa in peptide])
 
 def peptide_mass(peptide, mass_table):
 	'''
@@ -35,23 +52,109 @@ def peptide_mass(peptide, mass_table):
 		mass += mass_table[aa]
 	return mass
 
-def create_mass_dictionary_from_file(filename):
-	mass_dictionary = {}
-	with open(filename) as f:
-		for line in f:
-			(aa, mass) = line.strip().split(" ")
-			mass_dictionary[aa] = int(mass)
-	return mass_dictionary
+def _spectra_of_batch(args):
+	'''
+	Compute the spectra of a list of peptides. Returns their lengths and their
+	concatenated masses as integer arrays.
+	'''
+	(peptides, mass_table, kind) = args
+	spectrum_function = SPECTRUM_FUNCTIONS[kind]
+	lengths = array('Q')
+	masses = array('q')
+	for peptide in peptides:
+		spectrum = spectrum_function([mass_table[aa] for aa in peptide])
+		lengths.append(len(spectrum))
+		masses.extend(spectrum)
+	return (lengths, masses)
+
+def write_spectra(peptides, mass_table, spectra_filename, kind='cyclic', workers=1, batch_size=BATCH_SIZE):
+	'''
+	Compute the cyclic or linear spectra of an iterable of peptides in a pool of
+	worker processes and write them, in the order of the peptides, to a spectra
+	file. Only one batch of spectra per worker is kept in memory, besides the offsets.
+	'''
+	if kind not in SPECTRUM_FUNCTIONS:
+		raise ValueError("Unknown spectrum kind: " + kind)
+	peptides = iter(peptides)
+	batches = iter(lambda: list(itertools.islice(peptides, batch_size)), [])
+	jobs = ((batch, mass_table, kind) for batch in batches)
+
+	offsets = array('Q', [0])
+	with open(spectra_filename, 'wb') as f:
+		f.write(SPECTRA_HEADER.pack(SPECTRA_MAGIC, 0, 0))
+		with multiprocessing.Pool(workers) as pool:
+			for (lengths, masses) in pool.imap(_spectra_of_batch, jobs):
+				for length in lengths:
+					offsets.append(offsets[-1] + length)
+				if sys.byteorder != 'little':
+					masses.byteswap()
+				f.write(masses.tobytes())
+
+		if sys.byteorder != 'little':
+			offsets.byteswap()
+		f.write(offsets.tobytes())
+		if sys.byteorder != 'little':
+			offsets.byteswap()
+		f.seek(0)
+		f.write(SPECTRA_HEADER.pack(SPECTRA_MAGIC, len(offsets) - 1, offsets[-1]))
+
+class SpectraFile:
+	'''
+	A memory-mapped spectra file, as written by write_spectra. Every spectrum
+	is a sorted integer memoryview into the file; nothing is parsed or copied.
+	'''
+
+	def __init__(self, spectra_filename):
+		with open(spectra_filename, 'rb') as f:
+			self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		view = memoryview(self.mapping)
 
-dataset_file = sys.argv[1]
-mass_table_file = sys.argv[2]
+		(magic, self.count, total) = SPECTRA_HEADER.unpack_from(view)
+		if magic != SPECTRA_MAGIC:
+			raise ValueError("Not a spectra file: " + spectra_filename)
+		if sys.byteorder != 'little':
+			raise ValueError("Spectra files can only be loaded on little-endian machines")
+
+		offset = SPECTRA_HEADER.size
+		self.masses = view[offset:offset+total*8].cast('q')
+		offset += total * 8
+		self.offsets = view[offset:offset+(self.count+1)*8].cast('Q')
+
+	def __len__(self):
+		return self.count
+
+	def __getitem__(self, i):
+		'''
+		Return the spectrum of the i-th peptide.
+		'''
+		if not 0 <= i < self.count:
+			raise IndexError("spectrum index out of range")
+		return self.masses[self.offsets[i]:self.offsets[i+1]]
+
+def solve(dataset_file, mass_dictionary):
+	'''
+	Solve the problem for a dataset file and return the output text.
+	'''
+	f = open(dataset_file)
+	peptide = f.readline().strip()
 
-f = open(dataset_file)
-peptide = f.readline().strip()
+	theoretical_spectrum = create_theoretical_spectrum(peptide, mass_dictionary)
 
-mass_dictionary = create_mass_dictionary_from_file(mass_table_file)
-theoretical_spectrum = create_theoretical_spectrum(peptide, mass_dictionary)
+	return ' '.join([str(i) for i in theoretical_spectrum])
 
-print (' '.join([str(i) for i in theoretical_spectrum]))
+if __name__ == '__main__':
+	if sys.argv[1] == '--batch':
+		# Compute the spectra of a file of peptides and save them
+		mass_dictionary = create_mass_dictionary_from_file(sys.argv[4])
+		kind = sys.argv[5] if len(sys.argv) > 5 else 'cyclic'
+		workers = int(sys.argv[6]) if len(sys.argv) > 6 else 1
+		with open(sys.argv[2]) as f:
+			peptides = (line.strip() for line in f if line.strip())
+			write_spectra(peptides, mass_dictionary, sys.argv[3], kind, workers)
+		sys.exit()
 
+	dataset_file = sys.argv[1]
+	mass_table_file = sys.argv[2]
 
+	mass_dictionary = create_mass_dictionary_from_file(mass_table_file)
+	print (solve(dataset_file, mass_dictionary))
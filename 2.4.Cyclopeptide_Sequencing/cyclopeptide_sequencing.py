@@ -1,267 +1,164 @@
 #!/usr/bin/python3
 
 import sys
-import collections
+import os
+import bisect
+import multiprocessing
+from array import array
 
-class AminoAcidsMassTable:
-	'''
-	A class that serves as a wrapper for the amino acid mass table
-	'''
-	
-	def __init__(self, mass_table_file):
-		self.mass_dic = self._create_mass_dictionary_from_file(mass_table_file)
-	
-	def mass_for_amino_acid(self, aa):
-		'''
-		Return the mass for the requested amino acid
-		'''
-		return self.mass_dic[aa]
-		
-	def masses(self):
-		'''
-		Returns all unique masses for all amino acids
-		'''
-		return sorted(list(set(self.mass_dic.values())))
-	
-	def amino_acids(self):
-		'''
-		Returns all amino acids
-		'''
-		return sorted(self.mass_dic.keys())
-	
-	def _create_mass_dictionary_from_file(self, filename):
-		'''
-		Reads a tab delimited file with amino acid masses and returns 
-		a dictionary with the masses.
-		'''
-		mass_dictionary = {}
-		with open(filename) as f:
-			for line in f:
-				(aa, mass) = line.strip().split(" ")
-				mass_dictionary[aa] = int(mass)
-		return mass_dictionary
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.tables import AminoAcidsMassTable
+from bio_algorithms.spectra import Spectrum, Peptide, linear_spectrum_of_prefix_masses
 
-class Spectrum:
+# Number of amino acids of the peptides at the roots of the subtrees searched
+# by the worker processes
+SPLIT_DEPTH = 2
+
+def cyclopeptide_sequencing(spectrum, aa_mass_table, canonical=False, workers=1, split_depth=SPLIT_DEPTH):
 	'''
-	A class that represents a mass spectrum.
+	Cyclopeptide Sequencing: find all the cyclic peptides whose theoretical
+	spectrum is identical to the spectrum, in order of their amino acid masses.
+	With canonical, every cyclic peptide is returned only once, in the form
+	that comes first among its rotations and their reversals.
+	
+	The peptides are grown one amino acid at a time, depth first. The budget
+	holds how many more times every mass may appear in the linear spectrum of
+	the current peptide, so a peptide extended by one amino acid is checked
+	only against the masses of its subpeptides ending at the new amino acid.
+	Only the amino acid masses that are in the spectrum are tried, and only
+	the rotations that start with their lightest amino acid are searched; the
+	other rotations and the reversals are added at the end.
+	
+	With more than one worker, the tree is cut at split_depth amino acids and
+	the subtrees under the consistent peptides of that length are searched in
+	worker processes, each depth first.
 	'''
-	
-	def __init__(self, masses):
-		self.masses = sorted(masses)
-	
-	def is_identical_to(self, comparing_spectrum):
-		'''
-		Check if the spectrum is identical to another one.
-		'''
-		compare = lambda x, y: collections.Counter(x) == collections.Counter(y)
-		#print (repr(self.masses) + "vs" + repr(comparing_spectrum.masses))
-		return compare(self.masses, comparing_spectrum.masses)
-	
-	def is_consistent_with(self, comparing_spectrum):
-		'''
-		Check if the spectrum is consistent with a reference one.
-		To be consistent, all its masses must be in the reference spectrum.
-		'''
-		for mass in self.masses:
-			if mass not in comparing_spectrum.masses:
-				return False
-		return True
-	
-class Peptide:
+	parent_mass = spectrum.parent_mass()
+	budget = array('L', spectrum.counts())
+	if not budget or budget[0] == 0:
+		return []
+	budget[0] -= 1 # The mass of the empty subpeptide
+	aa_masses = [aa_mass for aa_mass in aa_mass_table.masses() if aa_mass < len(budget) and budget[aa_mass] > 0]
+	
+	found_pep_list = []
+	if workers > 1:
+		frontier = []
+		branch_and_bound(array('q', [0]), budget, parent_mass, aa_masses, spectrum, found_pep_list, frontier, split_depth)
+		with multiprocessing.Pool(workers) as pool:
+			jobs = [(prefix_masses, spectrum, aa_masses) for prefix_masses in frontier]
+			for subtree_pep_list in pool.map(_explore_subtree, jobs):
+				found_pep_list.extend(subtree_pep_list)
+	else:
+		branch_and_bound(array('q', [0]), budget, parent_mass, aa_masses, spectrum, found_pep_list)
+	
+	if canonical:
+		forms = set(min(cyclic_forms(pep.mass_list)) for pep in found_pep_list)
+	else:
+		forms = set()
+		for pep in found_pep_list:
+			forms.update(cyclic_forms(pep.mass_list))
+	return [Peptide(mass_list=list(masses)) for masses in sorted(forms)]
+
+def branch_and_bound(prefix_masses, budget, parent_mass, aa_masses, spectrum, output_pep_list, frontier=None, max_length=None):
 	'''
-	A class that represents a peptide.
+	Extend the peptide with the given prefix masses, which is consistent with
+	the spectrum, by every amino acid mass (in increasing order) that is not
+	lighter than its first amino acid, and keep going with the extensions that
+	are still consistent. Peptides with the parent mass are not extended; those
+	with the right cyclic spectrum are added to output_pep_list. If frontier is
+	given, the prefix masses of the consistent peptides of max_length amino
+	acids are added to it instead of being extended. The budget and prefix
+	masses are restored on return.
 	'''
-	
-	def __init__(self, aa_seq=None, aa_list=None, mass_list=None):
-		self.aa_seq = aa_seq
-		self.aa_list = aa_list
-		self.mass_list = mass_list
+	total = prefix_masses[-1]
+	k = len(prefix_masses)
+	first = bisect.bisect_left(aa_masses, prefix_masses[1]) if k > 1 else 0
+	for index in range(first, len(aa_masses)):
+		new_total = total + aa_masses[index]
+		if new_total > parent_mass:
+			break
 		
-		if self.aa_seq is not None and self.aa_list is None:
-			self.aa_list = list(self.aa_seq)
-		
-	def theoretical_cyclospectrum(self, **args):
-		'''
-		Calculate the theoretical spectrum of a peptide given a table
-		with the amino acid masses. Theoretical spectrum is the list
-		of the total masses of all the cyclic subpeptides.
-		'''
-		if self.mass_list is None and 'aa_mass_table' not in args:
-			raise Exception("FATAL")
-		if 'aa_mass_table' in args:
-			self.create_mass_list_from_aa_mass_table(aa_mass_table)
-		
-		theoretical_cyclospectrum = [0, self.total_mass()]
-		for subpeptide in self.cyclic_subpeptides():
-			theoretical_cyclospectrum.append(subpeptide.total_mass())
-		
-		return Spectrum(sorted(theoretical_cyclospectrum))
-	
-	def theoretical_linearspectrum(self, **args):
-		'''
-		Calculate the theoretical spectrum of a peptide given a table
-		with the amino acid masses. Theoretical spectrum is the list
-		of the total masses of all the cyclic subpeptides.
-		'''
-		if self.mass_list is None and 'aa_mass_table' not in args:
-			raise Exception("FATAL")
-		if 'aa_mass_table' in args:
-			self.create_mass_list_from_aa_mass_table(aa_mass_table)
+		# Take the masses of the k subpeptides ending at the new amino acid from the budget
+		i = 0
+		while i < k and budget[new_total - prefix_masses[i]] > 0:
+			budget[new_total - prefix_masses[i]] -= 1
+			i += 1
 		
-		theoretical_linearspectrum = [0, self.total_mass()]
-		for subpeptide in self.subpeptides():
-			theoretical_linearspectrum.append(subpeptide.total_mass())
+		if i == k:
+			prefix_masses.append(new_total)
+			if new_total == parent_mass:
+				pep = Peptide(prefix_masses=prefix_masses[:])
+				if pep.theoretical_cyclospectrum().is_identical_to(spectrum):
+					output_pep_list.append(pep)
+			elif frontier is not None and k == max_length:
+				frontier.append(prefix_masses[:])
+			else:
+				branch_and_bound(prefix_masses, budget, parent_mass, aa_masses, spectrum, output_pep_list, frontier, max_length)
+			prefix_masses.pop()
 		
-		return Spectrum(sorted(theoretical_linearspectrum))
-	
-	def total_mass(self, **args):
-		'''
-		Calculate the total theoretical mass of a peptide given a table
-		with the amino acid masses
-		'''
-		if self.mass_list is None and 'aa_mass_table' not in args:
-			raise Exception("FATAL")
-		if 'aa_mass_table' in args:
-			self.create_mass_list_from_aa_mass_table(aa_mass_table)
-		return sum(self.mass_list)
-	
-	def create_mass_list_from_aa_mass_table(self, aa_mass_table):
-		'''
-		Create a list with masses of the peptide, given a table with the
-		amino acid masses
-		'''
-		if self.mass_list is None:
-			self.mass_list = []
-			for aa in self.aa_list:
-				self.mass_list.append(aa_mass_table.mass_for_amino_acid(aa))
-	
-	def cyclic_subpeptides(self):
-		'''
-		Return all subpeptides for the Peptide.
-		Also returns subpeptides that span the end and the start of the Peptide.
-		'''
-		for i in range(len(self)):
-			for width in range(1, len(self)):
-				subpeptide = self._extract_subpeptide_cyclically(width, i)
-				yield subpeptide
-	
-	def subpeptides(self):
-		'''
-		Return all subpeptides for the Peptide.
-		Also returns subpeptides that span the end and the start of the Peptide.
-		'''
-		for i in range(len(self)):
-			for width in range(1, len(self)):
-				subpeptide = self._extract_subpeptide(width, i)
-				if subpeptide is not None:
-					yield subpeptide
-	
-	def _extract_subpeptide(self, width, from_pos):
-		'''
-		Extract a part of the peptide from 'from_pos' with length 'width'. 
-		If 'width' is larger than the peptide, continue from peptide start.
-		'''
-		subpeptide_aa_seq = ''
-		subpeptide_aa_list = []
-		subpeptide_mass_list = []
-		for i in range(from_pos, from_pos+width):
-			pos = i
-			if pos >= len(self):
-				return None
-			if (self.aa_seq is not None):
-				subpeptide_aa_seq += self.aa_seq[pos]
-			if (self.aa_list is not None):
-				subpeptide_aa_list.append(self.aa_list[pos])
-			if (self.mass_list is not None):
-				subpeptide_mass_list.append(self.mass_list[pos])
-				
-		return Peptide(aa_seq=subpeptide_aa_seq, aa_list=subpeptide_aa_list, mass_list=subpeptide_mass_list)
-	
-	def _extract_subpeptide_cyclically(self, width, from_pos):
-		'''
-		Extract a part of the peptide from 'from_pos' with length 'width'. 
-		If 'width' is larger than the peptide, continue from peptide start.
-		'''
-		subpeptide_aa_seq = ''
-		subpeptide_aa_list = []
-		subpeptide_mass_list = []
-		for i in range(from_pos, from_pos+width):
-			pos = i
-			if pos >= len(self):
-				pos = pos - len(self)
-			if (self.aa_seq is not None):
-				subpeptide_aa_seq += self.aa_seq[pos]
-			if (self.aa_list is not None):
-				subpeptide_aa_list.append(self.aa_list[pos])
-			if (self.mass_list is not None):
-				subpeptide_mass_list.append(self.mass_list[pos])
-				
-		return Peptide(aa_seq=subpeptide_aa_seq, aa_list=subpeptide_aa_list, mass_list=subpeptide_mass_list)
-	
-	def __len__(self):
-		if self.aa_seq is not None:
-			return len(self.aa_seq)
-		if self.aa_list is not None:
-			return len(self.aa_list)
-		if self.mass_list is not None:
-			return len(self.mass_list)
+		for j in range(i):
+			budget[new_total - prefix_masses[j]] += 1
 
-def cyclopeptide_sequencing(spectrum, aa_mass_table):
-	output_pep_list = []
-	pep_list = [Peptide(mass_list=[])]
-	while pep_list:
-		pep_list = expand_list(pep_list, aa_mass_table.masses())
-		index = 0
-		while index >= 0 and index < len(pep_list):
-			pep = pep_list[index]
-			
-			if (pep.theoretical_cyclospectrum().is_identical_to(spectrum)):
-				output_pep_list.append(pep)
-				pep_list.pop(index)
-				continue
-			
-			if not pep.theoretical_linearspectrum().is_consistent_with(spectrum):
-				#print ("Not consistent")
-				#if (len(pep.theoretical_cyclospectrum().masses) < 3):
-					#print (repr(pep.theoretical_cyclospectrum().masses))
-				pep_list.pop(index)
-				continue
-			index += 1
+def _explore_subtree(args):
+	'''
+	Search the subtree under a consistent peptide, given by its prefix masses,
+	in a worker process. The budget is rebuilt from the spectrum by taking out
+	the linear spectrum of the peptide.
+	'''
+	(prefix_masses, spectrum, aa_masses) = args
+	budget = array('L', spectrum.counts())
+	for mass in linear_spectrum_of_prefix_masses(prefix_masses):
+		budget[mass] -= 1
 	
+	output_pep_list = []
+	branch_and_bound(prefix_masses, budget, spectrum.parent_mass(), aa_masses, spectrum, output_pep_list)
 	return output_pep_list
-		
-def expand_list(pep_list, aa_masses):
+
+def cyclic_forms(mass_list):
 	'''
-	Get a list of peptides (each peptide is defined as an array of its amino
-	acid masses) and create a new list with the same peptides expanded
-	by one amino acid.
+	Return the set of all the rotations of a cyclic peptide and of its reversal,
+	as tuples of amino acid masses.
 	'''
-	expanded_pep_list = []
-	for pep in pep_list:
-		for aa_mass in aa_masses:
-			expanded_pep_list.append(Peptide(mass_list = pep.mass_list + [aa_mass]))
-	return expanded_pep_list
-	
-# Get the command line arguments
-dataset_file = sys.argv[1]
-mass_table_file = sys.argv[2]
+	forms = set()
+	for masses in (mass_list, mass_list[::-1]):
+		for i in range(len(masses)):
+			forms.add(tuple(masses[i:] + masses[:i]))
+	return forms
+
+def solve(dataset_file, aa_mass_table, canonical=False, workers=1):
+	'''
+	Solve the problem for a dataset file and return the output text.
+	With canonical, every cyclic peptide is printed once instead of in all
+	its rotations and reversals.
+	'''
+	# Open the dataset file and read the spectrum masses
+	f = open(dataset_file)
+	input_masses = [int(mass) for mass in f.readline().strip().split(' ')]
 
-# Open the dataset file and read the spectrum masses
-f = open(dataset_file)
-input_masses = [int(mass) for mass in f.readline().strip().split(' ')]
+	# Create a spectrum
+	spectrum = Spectrum(input_masses)
 
-# Create a spectrum
-spectrum = Spectrum(input_masses)
+	# Run the algorithm
+	peptides_list = cyclopeptide_sequencing(spectrum, aa_mass_table, canonical, workers)
 
-# Create the amino acid mass table
-aa_mass_table = AminoAcidsMassTable(mass_table_file)
+	mass_strings = []
+	for pep in peptides_list:
+		mass_strings.append('-'.join(str(mass) for mass in pep.mass_list))
+	return ' '.join(mass_strings)
 
-# Run the algorithm
-peptides_list = cyclopeptide_sequencing(spectrum, aa_mass_table)
+if __name__ == '__main__':
+	# Get the command line arguments: dataset.txt mass_table.txt [workers] [--canonical]
+	# --canonical prints each cyclic peptide only once, and may appear anywhere
+	args = sys.argv[1:]
+	canonical = '--canonical' in args
+	if canonical:
+		args.remove('--canonical')
+	dataset_file = args[0]
+	mass_table_file = args[1]
+	workers = int(args[2]) if len(args) > 2 else 1
 
-# Print
-mass_strings = []
-for pep in peptides_list:
-	mass_strings.append('-'.join(str(mass) for mass in pep.mass_list))
-print (' '.join(mass_strings))
+	# Create the amino acid mass table
+	aa_mass_table = AminoAcidsMassTable(mass_table_file)
 
+	# Print
+	print (solve(dataset_file, aa_mass_table, canonical, workers))
@@ -0,0 +1,104 @@
+'''
+Synthetic dataset generators for the benchmarks, one per problem.
+
+Every generator takes a random.Random instance and a size and returns the
+text of a dataset file in the format the solution of the problem reads.
+'''
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bio_algorithms.tables import create_codon_dictionary_from_file, create_mass_dictionary_from_file
+
+CODON_DICTIONARY = create_codon_dictionary_from_file()
+SENSE_CODONS = sorted(codon for codon, aa in CODON_DICTIONARY.items() if aa != "stop" and 'T' not in codon)
+STOP_CODONS = sorted(codon for codon, aa in CODON_DICTIONARY.items() if aa == "stop" and 'T' not in codon)
+AMINO_ACID_MASSES = sorted(set(create_mass_dictionary_from_file().values()))
+AMINO_ACIDS = sorted(create_mass_dictionary_from_file().keys())
+
+def random_genome(rng, length):
+	return ''.join(rng.choices('ACGT', k=length))
+
+def random_cyclic_spectrum(rng, length):
+	'''
+	Return the cyclic spectrum of a random cyclic peptide of the given length.
+	'''
+	masses = rng.choices(AMINO_ACID_MASSES, k=length)
+	prefix = [0]
+	for mass in masses:
+		prefix.append(prefix[-1] + mass)
+	spectrum = [0, prefix[-1]]
+	for i in range(length):
+		for width in range(1, length):
+			j = i + width
+			if j <= length:
+				spectrum.append(prefix[j] - prefix[i])
+			else:
+				spectrum.append(prefix[-1] - prefix[i] + prefix[j - length])
+	return sorted(spectrum)
+
+def frequent_words(rng, size):
+	return random_genome(rng, size) + '\n9\n'
+
+def reverse_complement(rng, size):
+	return random_genome(rng, size) + '\n'
+
+def pattern_matching(rng, size):
+	genome = random_genome(rng, size)
+	start = rng.randrange(size - 9)
+	return genome[start:start+9] + '\n' + genome + '\n'
+
+def clump_finding(rng, size):
+	return random_genome(rng, size) + '\n9 500 3\n'
+
+def minimum_skew(rng, size):
+	return random_genome(rng, size) + '\n'
+
+def approximate_pattern_matching(rng, size):
+	genome = random_genome(rng, size)
+	start = rng.randrange(size - 9)
+	return genome[start:start+9] + '\n' + genome + '\n2\n'
+
+def frequent_words_with_mismatches(rng, size):
+	return random_genome(rng, size) + ' 9 2\n'
+
+def frequent_words_with_mismatches_and_reverse_complement(rng, size):
+	return random_genome(rng, size) + '\n9 2\n'
+
+def protein_translation(rng, size):
+	# Only sense codons, so that the translation does not stop early
+	return ''.join(rng.choices(SENSE_CODONS, k=size // 3 - 1)) + STOP_CODONS[0] + '\n'
+
+def peptide_encoding(rng, size):
+	return random_genome(rng, size) + '\n' + ''.join(rng.choices(AMINO_ACIDS, k=10)) + '\n'
+
+def theoretical_spectrum(rng, size):
+	return ''.join(rng.choices(AMINO_ACIDS, k=size)) + '\n'
+
+def cyclopeptide_sequencing(rng, size):
+	return ' '.join(map(str, random_cyclic_spectrum(rng, size))) + '\n'
+
+def leaderboard_cyclopeptide_sequencing(rng, size):
+	# The leaderboard size N is the scaling parameter; the peptide has 15 residues
+	spectrum = random_cyclic_spectrum(rng, 15)
+	return str(size) + '\n' + ' '.join(map(str, spectrum)) + '\n'
+
+GENOME_SIZES = [10**4, 10**5, 10**6, 10**7, 10**8]
+
+# Problem id: (generator, sizes, unit of the size)
+GENERATORS = {
+	'1.1': (frequent_words, GENOME_SIZES, 'bases'),
+	'1.2': (reverse_complement, GENOME_SIZES, 'bases'),
+	'1.3': (pattern_matching, GENOME_SIZES, 'bases'),
+	'1.4': (clump_finding, GENOME_SIZES, 'bases'),
+	'1.5': (minimum_skew, GENOME_SIZES, 'bases'),
+	'1.6': (approximate_pattern_matching, GENOME_SIZES, 'bases'),
+	'1.7': (frequent_words_with_mismatches, GENOME_SIZES, 'bases'),
+	'1.8': (frequent_words_with_mismatches_and_reverse_complement, GENOME_SIZES, 'bases'),
+	'2.1': (protein_translation, GENOME_SIZES, 'bases'),
+	'2.2': (peptide_encoding, GENOME_SIZES, 'bases'),
+	'2.3': (theoretical_spectrum, [5, 10, 30, 100, 300, 1000], 'residues'),
+	'2.4': (cyclopeptide_sequencing, [5, 10, 15, 20, 25, 30], 'residues'),
+	'2.5': (leaderboard_cyclopeptide_sequencing, [10, 30, 100, 300, 1000], 'leaderboard size'),
+}
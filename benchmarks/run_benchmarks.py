@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+
+'''
+Scaling benchmarks for all the solutions.
+
+	python benchmarks/run_benchmarks.py --output results.json
+	python benchmarks/run_benchmarks.py --problems 1.1 1.5 --max-size 1000000 --output results.json
+	python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json results.json
+
+For every problem a synthetic dataset is generated at increasing sizes and
+solved in a fresh process through the batch runner, so that the peak RSS of
+each job is measured on its own. Wall time is measured around the solve call
+only, without interpreter startup and table parsing. Once a size exceeds the
+timeout, the larger sizes of that problem are skipped.
+'''
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from benchmarks.generators import GENERATORS
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def run_job(problem_id, input_file):
+	'''
+	Solve one dataset and print the solve time as JSON. Runs in the child process.
+	'''
+	from bio_algorithms.runner import BatchRunner
+	runner = BatchRunner()
+	runner.module(problem_id)
+	start = time.perf_counter()
+	runner.solve(problem_id, input_file)
+	print(json.dumps({'wall_time': time.perf_counter() - start}))
+
+def measure(problem_id, input_file, timeout):
+	'''
+	Solve a dataset in a child process and return its wall time and peak RSS (KiB).
+	'''
+	process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--job', problem_id, input_file], stdout=subprocess.PIPE)
+	deadline = time.monotonic() + timeout
+	while True:
+		(pid, status, usage) = os.wait4(process.pid, os.WNOHANG)
+		if pid != 0:
+			break
+		if time.monotonic() > deadline:
+			process.kill()
+			(pid, status, usage) = os.wait4(process.pid, 0)
+			process.returncode = -9
+			return {'status': 'timeout', 'peak_rss_kib': usage.ru_maxrss}
+		time.sleep(0.01)
+	output = process.stdout.read()
+	process.stdout.close()
+	process.returncode = os.waitstatus_to_exitcode(status)
+	if process.returncode != 0:
+		return {'status': 'error', 'peak_rss_kib': usage.ru_maxrss}
+	result = json.loads(output)
+	result['status'] = 'ok'
+	result['peak_rss_kib'] = usage.ru_maxrss
+	return result
+
+def git_revision():
+	try:
+		return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+def run_benchmarks(problem_ids, max_size, timeout, seed):
+	results = []
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		for problem_id in problem_ids:
+			(generator, sizes, unit) = GENERATORS[problem_id]
+			for size in sizes:
+				if max_size is not None and size > max_size:
+					break
+				input_file = os.path.join(tmp_dir, 'dataset.txt')
+				with open(input_file, 'w') as f:
+					f.write(generator(random.Random(seed), size))
+
+				result = measure(problem_id, input_file, timeout)
+				result.update({'problem': problem_id, 'size': size, 'unit': unit})
+				if result['status'] == 'ok':
+					result['throughput'] = size / result['wall_time'] if result['wall_time'] > 0 else None
+				results.append(result)
+				print(json.dumps(result), file=sys.stderr)
+				if result['status'] != 'ok':
+					break
+	return results
+
+def compare(baseline_file, results_file):
+	'''
+	Print the wall time and peak RSS ratios (new / baseline) of every
+	(problem, size) measured successfully in both result files.
+	'''
+	with open(baseline_file) as f:
+		baseline = {(r['problem'], r['size']): r for r in json.load(f)['results'] if r['status'] == 'ok'}
+	with open(results_file) as f:
+		results = json.load(f)['results']
+	print('problem size wall_time_ratio peak_rss_ratio')
+	for result in results:
+		key = (result['problem'], result['size'])
+		if result['status'] != 'ok' or key not in baseline:
+			continue
+		old = baseline[key]
+		print(result['problem'], result['size'],
+			'%.3f' % (result['wall_time'] / old['wall_time'] if old['wall_time'] > 0 else float('inf')),
+			'%.3f' % (result['peak_rss_kib'] / old['peak_rss_kib']))
+
+def main(argv):
+	parser = argparse.ArgumentParser(description='Scaling benchmarks for all the solutions')
+	parser.add_argument('--problems', nargs='+', default=sorted(GENERATORS), help='problem ids to benchmark (default: all)')
+	parser.add_argument('--max-size', type=int, default=None, help='skip sizes larger than this')
+	parser.add_argument('--timeout', type=float, default=600, help='seconds allowed per dataset')
+	parser.add_argument('--seed', type=int, default=1, help='seed of the dataset generators')
+	parser.add_argument('--output', default='benchmark_results.json', help='file the JSON results are written to')
+	parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'RESULTS'), help='compare two result files instead of running')
+	parser.add_argument('--job', nargs=2, metavar=('PROBLEM', 'INPUT'), help=argparse.SUPPRESS)
+	args = parser.parse_args(argv[1:])
+
+	if args.job:
+		run_job(*args.job)
+		return
+	if args.compare:
+		compare(*args.compare)
+		return
+
+	results = run_benchmarks(args.problems, args.max_size, args.timeout, args.seed)
+	with open(args.output, 'w') as f:
+		json.dump({
+			'revision': git_revision(),
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'seed': args.seed,
+			'results': results,
+		}, f, indent=1)
+
+if __name__ == '__main__':
+	main(sys.argv)
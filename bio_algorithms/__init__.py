@@ -0,0 +1,13 @@
+'''
+Shared code of the Bioinformatics Algorithms solutions.
+
+Importing the package or any of its modules does not run anything; the
+solutions in the problem directories import what they need from here.
+'''
+
+from .dna import reverse_complement, edit_distance, approximate_pattern_match_positions, read_sequence_chunks
+from .kmers import encode_sequence, decode_kmer, neighborhood, rolling_kmer_codes, indices_of_max
+from .tables import AminoAcidsMassTable, create_codon_dictionary_from_file, create_mass_dictionary_from_file
+from .proteins import translate_to_protein, CodonTable
+from .suffix_array import build_suffix_array
+from .spectra import cyclic_spectrum, linear_spectrum, Spectrum, Peptide
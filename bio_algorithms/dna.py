@@ -0,0 +1,192 @@
+'''
+Common operations on DNA strings: reverse complement and (approximate) matching,
+and streaming of sequence files.
+'''
+
+import operator
+
+# Complement of the DNA/RNA nucleotides and of the IUPAC ambiguity codes, in both cases
+IUPAC_CODES =       b'ACGTURYKMSWBDHVNacgturykmswbdhvn-.'
+IUPAC_COMPLEMENTS = b'TGCAAYRMKSWVHDBNtgcaayrmkswvhdbn-.'
+COMPLEMENT_TABLE = bytes.maketrans(IUPAC_CODES, IUPAC_COMPLEMENTS)
+
+# Longest pattern accepted by the shift-add backend (one machine word of counters)
+SHIFT_ADD_MAX_PATTERN_LENGTH = 64
+
+# Size in bytes of the blocks read from a sequence file in streaming mode
+CHUNK_SIZE = 1 << 20
+
+def reverse_complement(seq):
+	"""Return the reverse complement of a DNA string."""
+
+	dna = seq.encode('ascii')
+	if dna.translate(None, IUPAC_CODES):
+		raise ValueError("Not a nucleotide or IUPAC code: " + repr(dna.translate(None, IUPAC_CODES)[:1].decode()))
+	return dna.translate(COMPLEMENT_TABLE)[::-1].decode('ascii')
+
+def approximate_pattern_match_positions(pattern, sequence, d, backend='bitvector'):
+	"""
+	Approximate Pattern Matching Problem: Find all approximate occurrences of a pattern in a string.
+	   Input: Two strings Pattern and Text along with an integer d.
+	   Output: All positions where Pattern appears in Text with at most d mismatches.
+
+	Two backends are available:
+	   'bitvector': compares all offsets at once, one pattern position at a time (default).
+	   'shift-add': streams the text through bit-parallel mismatch counters.
+	"""
+
+	if backend == 'bitvector':
+		return bitvector_match_positions(pattern, sequence, d)
+	if backend == 'shift-add':
+		return shift_add_match_positions(pattern, sequence, d)
+	raise ValueError("Unknown backend: " + backend)
+
+
+def shift_add_match_positions(pattern, sequence, d):
+	"""
+	Shift-add approximate matching. The state packs one mismatch counter per
+	pattern position, each in a field wide enough to hold len(pattern).
+	For every text character the state is shifted by one field and the
+	mismatch vector of the character is added, so the top field holds the
+	number of mismatches of the whole pattern ending at the current character.
+	"""
+
+	pattern_length = len(pattern)
+	if pattern_length > SHIFT_ADD_MAX_PATTERN_LENGTH:
+		raise ValueError("Pattern too long for shift-add backend: " + str(pattern_length))
+	if pattern_length == 0 or pattern_length > len(sequence):
+		return []
+
+	field_width = pattern_length.bit_length()
+	state_mask = (1 << (field_width * pattern_length)) - 1
+	top_shift = field_width * (pattern_length - 1)
+	field_mask = (1 << field_width) - 1
+
+	# Mismatch vector of each character: a 1 in field j if the pattern has a
+	# different character at position j. After an update, field j holds the
+	# mismatches of the pattern prefix of length j + 1 ending at the character.
+	all_mismatches = 0
+	for j in range(pattern_length):
+		all_mismatches |= 1 << (field_width * j)
+	mismatch_vectors = {}
+	for nt in set(pattern) | set(sequence):
+		vector = all_mismatches
+		for i, pattern_nt in enumerate(pattern):
+			if pattern_nt == nt:
+				vector -= 1 << (field_width * i)
+		mismatch_vectors[nt] = vector
+
+	pattern_positions = []
+	state = 0
+	for i, nt in enumerate(sequence):
+		state = ((state << field_width) + mismatch_vectors[nt]) & state_mask
+		if i >= pattern_length - 1 and (state >> top_shift) & field_mask <= d:
+			pattern_positions.append(str(i - pattern_length + 1))
+
+	return pattern_positions
+
+
+def bitvector_match_positions(pattern, sequence, d):
+	"""
+	Vectorised approximate matching. The text is turned into one bit vector per
+	character (a Python integer with bit i set if the text has that character at
+	position i). For pattern position j the vector of the pattern character,
+	shifted by j, holds the matches of all offsets at once. The mismatches of all
+	offsets are summed in bit-sliced counters, so every step is a whole-integer
+	operation instead of a loop over offsets.
+	"""
+
+	pattern_length = len(pattern)
+	offsets = len(sequence) - pattern_length + 1
+	if pattern_length == 0 or offsets <= 0:
+		return []
+	offsets_mask = (1 << offsets) - 1
+
+	# Reverse the text once so that bit i of the parsed binary number is position i.
+	# DNA is ASCII, which allows byte-level translation to the binary digits.
+	reversed_sequence = sequence[::-1]
+	if reversed_sequence.isascii():
+		reversed_sequence = reversed_sequence.encode('ascii')
+	character_vectors = {}
+	for nt in set(pattern):
+		if isinstance(reversed_sequence, bytes) and nt.isascii():
+			table = bytes(ord('1') if c == ord(nt) else ord('0') for c in range(256))
+			character_vectors[nt] = int(reversed_sequence.translate(table), 2)
+		else:
+			character_vectors[nt] = int(''.join('1' if c == nt else '0' for c in sequence[::-1]), 2)
+
+	# Bit-sliced mismatch counters: counter_bits[b] holds bit b of the count of
+	# every offset. Counts above d are only needed as "too many", so they
+	# saturate into the overflow vector.
+	counter_bits = [0] * max(1, d.bit_length())
+	overflow = 0
+	for j, nt in enumerate(pattern):
+		carry = ~(character_vectors[nt] >> j) & offsets_mask
+		for b in range(len(counter_bits)):
+			counter_bits[b], carry = counter_bits[b] ^ carry, counter_bits[b] & carry
+		overflow |= carry
+
+	# Offsets whose count is at most d and that did not overflow
+	accepted = 0
+	for count in range(d + 1):
+		equal = offsets_mask & ~overflow
+		for b, bits in enumerate(counter_bits):
+			equal &= bits if (count >> b) & 1 else ~bits
+		accepted |= equal
+
+	# Extract the set bits from the binary representation
+	pattern_positions = []
+	bits = format(accepted, 'b')[::-1]
+	i = bits.find('1')
+	while i >= 0:
+		pattern_positions.append(str(i))
+		i = bits.find('1', i + 1)
+
+	return pattern_positions
+
+
+def edit_distance(pattern1, pattern2):
+	"""
+	Compare two patterns and calculate edit distance - the number of mismatches between the sequences
+	"""
+
+	return sum(map(operator.ne, pattern1, pattern2))
+
+def read_sequence_chunks(f, chunk_size=CHUNK_SIZE):
+	'''
+	Read a sequence from a binary file object in blocks of chunk_size bytes and
+	yield the sequence characters of each block. FASTA header lines (starting
+	with '>') and whitespace are skipped, and the lines are concatenated.
+	'''
+	at_line_start = True
+	in_header = False
+	while True:
+		block = f.read(chunk_size)
+		if not block:
+			break
+
+		pieces = []
+		pos = 0
+		while pos < len(block):
+			if in_header:
+				end = block.find(b'\n', pos)
+				if end < 0:
+					break
+				in_header = False
+				at_line_start = True
+				pos = end + 1
+			elif at_line_start and block[pos] == ord('>'):
+				in_header = True
+			else:
+				end = block.find(b'\n', pos)
+				if end < 0:
+					pieces.append(block[pos:])
+					at_line_start = False
+					break
+				pieces.append(block[pos:end])
+				at_line_start = True
+				pos = end + 1
+
+		chunk = b''.join(pieces).translate(None, b' \t\r')
+		if chunk:
+			yield chunk
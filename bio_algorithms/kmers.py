@@ -0,0 +1,100 @@
+'''
+Kmers packed in integers, 2 bits per nucleotide (A=0, C=1, G=2, T=3), so a
+kmer of size k is an integer in [0, 4^k). With this encoding the complement
+of a nucleotide code x is 3 - x.
+'''
+
+import itertools
+import functools
+
+NUCLEOTIDES = 'ACGT'
+
+# Any character other than A, C, G, T is encoded as INVALID_CODE
+INVALID_CODE = 4
+ENCODING_TABLE = bytes('ACGTacgt'.find(chr(c)) % 4 if chr(c) in 'ACGTacgt' else INVALID_CODE for c in range(256))
+
+def encode_sequence(text):
+	"""
+	Translate a DNA string into a bytes object of 2-bit nucleotide codes.
+	Characters other than A, C, G, T are translated to INVALID_CODE.
+	"""
+	return text.encode('ascii').translate(ENCODING_TABLE)
+
+def decode_kmer(code, k):
+	"""
+	Convert a packed kmer code back to its DNA string.
+	"""
+	kmer = []
+	for i in range(k):
+		kmer.append(NUCLEOTIDES[code & 3])
+		code >>= 2
+	return ''.join(reversed(kmer))
+
+def rolling_kmer_codes(encoded, k, reverse_complement=False):
+	"""
+	Yield (position, code) for every kmer of size k in an encoded sequence, or
+	(position, code, revcomp_code) with the code of its reverse complement.
+	The code is updated by shifting in one nucleotide per position, so no
+	substring is ever created; the reverse complement shifts the complement of
+	the nucleotide in at the left. Kmers overlapping an invalid character are skipped.
+	"""
+	mask = (1 << (2 * k)) - 1
+	top_shift = 2 * (k - 1)
+	code = 0
+	revcomp_code = 0
+	valid_length = 0
+	for i, nt in enumerate(encoded):
+		if nt == INVALID_CODE:
+			valid_length = 0
+			continue
+		code = ((code << 2) | nt) & mask
+		valid_length += 1
+		if reverse_complement:
+			revcomp_code = (revcomp_code >> 2) | ((3 - nt) << top_shift)
+			if valid_length >= k:
+				yield (i - k + 1, code, revcomp_code)
+		elif valid_length >= k:
+			yield (i - k + 1, code)
+
+def indices_of_max(counts):
+	"""
+	Return the indices of an array of counts that hold its maximum count, in
+	increasing order, or an empty list if all the counts are 0.
+	The scan for each index is done in C by array.index.
+	"""
+	max_count = max(counts, default=0)
+	indices = []
+	if max_count == 0:
+		return indices
+	index = counts.index(max_count)
+	while True:
+		indices.append(index)
+		try:
+			index = counts.index(max_count, index + 1)
+		except ValueError:
+			break
+	return indices
+
+def neighborhood(code, k, d):
+	"""
+	Return an iterator over the codes of all kmers with at most d mismatches from
+	the kmer with the given code. Only the XOR masks are cached, once per (k, d);
+	the neighbors are produced on the fly, so memory does not grow with the
+	number of distinct kmers.
+	"""
+	return map(code.__xor__, mismatch_masks(k, d))
+
+@functools.lru_cache(maxsize=None)
+def mismatch_masks(k, d):
+	"""
+	Return the XOR masks that turn a packed kmer into each of its neighbors with at
+	most d mismatches. XOR with 1, 2 or 3 at a position changes the nucleotide to
+	each of the three other ones, so the masks do not depend on the kmer itself.
+	"""
+	masks = [0]
+	for distance in range(1, d + 1):
+		for positions in itertools.combinations(range(k), distance):
+			choices = [(1 << 2*pos, 2 << 2*pos, 3 << 2*pos) for pos in positions]
+			for substitution in itertools.product(*choices):
+				masks.append(sum(substitution))
+	return tuple(masks)
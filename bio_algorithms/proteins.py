@@ -0,0 +1,150 @@
+'''
+Translation of RNA and DNA into proteins.
+
+Codon tables can be compiled into a CodonTable, which translates whole
+sequences, or streams of sequence chunks, without a dictionary lookup per codon.
+'''
+
+def translate_to_protein(rna, codon_dictionary):
+	'''
+	Translate an RNA (or DNA) string into an amino acid string, stopping at
+	the first stop codon.
+	'''
+	protein = []
+	for i in range(0, len(rna)-2, 3):
+		aa = codon_dictionary[rna[i:i+3]]
+		if aa == "stop":
+			break
+		protein.append(aa)
+	return ''.join(protein)
+
+# Nucleotide codes of the codon tables: A=0, C=1, G=2, U/T=3, anything else INVALID_NUCLEOTIDE
+INVALID_NUCLEOTIDE = 4
+NUCLEOTIDE_ENCODING_TABLE = bytes('ACGUacgu'.find(chr(c)) % 4 if chr(c) in 'ACGUacgu' else
+	'ACGTacgt'.find(chr(c)) % 4 if chr(c) in 'ACGTacgt' else INVALID_NUCLEOTIDE for c in range(256))
+
+# Letter of the stop codons in the compiled table, and of codons with an invalid nucleotide
+STOP_LETTER = b'*'
+INVALID_LETTER = b'?'
+
+def codon_code(codon):
+	'''
+	Return the 6-bit code of a codon (16 * first + 4 * second + third nucleotide code),
+	or 64 if the codon has an invalid nucleotide.
+	'''
+	encoded = codon.encode('ascii').translate(NUCLEOTIDE_ENCODING_TABLE)
+	if INVALID_NUCLEOTIDE in encoded:
+		return 64
+	(first, second, third) = encoded
+	return 16 * first + 4 * second + third
+
+class CodonTable:
+	'''
+	A codon table compiled into a 64-entry array of amino acid letters,
+	indexed by the 6-bit code of the codon.
+
+	A sequence is translated without a lookup per codon: the nucleotide codes
+	of the first, second and third codon positions are combined into one byte
+	per codon with big integer arithmetic (every byte stays below 256, so no
+	carry crosses bytes), and the bytes are mapped to letters with a single
+	bytes.translate.
+	'''
+
+	def __init__(self, codon_dictionary):
+		letters = bytearray(INVALID_LETTER * 256)
+		for (codon, aa) in codon_dictionary.items():
+			code = codon_code(codon)
+			if code < 64:
+				letters[code] = ord(STOP_LETTER) if aa == "stop" else ord(aa)
+		if INVALID_LETTER in letters[:64]:
+			raise ValueError("The codon table does not have all 64 codons")
+		self.letters = bytes(letters)
+
+	@staticmethod
+	def codon_codes(sequence):
+		'''
+		Return the codes of the complete codons of a bytes sequence, one byte per codon.
+		Codons with an invalid nucleotide get a code of 64 or more.
+
+		>>> [code >= 64 for code in CodonTable.codon_codes(b'AUNANAGCNNAAAUG')]
+		[True, True, True, True, False]
+		'''
+		n = len(sequence) // 3
+		encoded = sequence[:3 * n].translate(NUCLEOTIDE_ENCODING_TABLE)
+		first = int.from_bytes(encoded[0::3], 'big')
+		second = int.from_bytes(encoded[1::3], 'big')
+		third = int.from_bytes(encoded[2::3], 'big')
+		# An invalid second or third nucleotide would carry into the next field and
+		# could still give a code below 64, so every codon with an INVALID_NUCLEOTIDE
+		# (the only code with bit 2 set) gets 4 more on its first nucleotide.
+		# The codes stay below 16 * 8 + 4 * 4 + 4 = 148, so no carry crosses bytes.
+		invalid = (first | second | third) & int.from_bytes(bytes([INVALID_NUCLEOTIDE]) * n, 'big')
+		codes = 16 * (first + invalid) + 4 * second + third
+		return codes.to_bytes(n, 'big')
+
+	def translate_bytes(self, sequence):
+		'''
+		Translate all the complete codons of a bytes sequence, including the
+		stop codons, which are translated to STOP_LETTER, and the codons with
+		an invalid nucleotide, which are translated to INVALID_LETTER.
+		'''
+		return self.codon_codes(sequence).translate(self.letters)
+
+	def _until_stop(self, sequence, protein):
+		'''
+		Cut a translated protein at its first stop codon. Returns the protein and
+		whether a stop codon was found. Raises ValueError for an invalid codon
+		before the stop codon; the codons after it are never read.
+		'''
+		stop = protein.find(STOP_LETTER)
+		if stop >= 0:
+			protein = protein[:stop]
+		invalid = protein.find(INVALID_LETTER)
+		if invalid >= 0:
+			codon = sequence[3 * invalid:3 * invalid + 3]
+			raise ValueError("Not a valid codon: " + repr(codon.decode('ascii', 'replace')))
+		return (protein, stop >= 0)
+
+	def translate_frames(self, sequence):
+		'''
+		Translate the three reading frames of a bytes sequence. Codon j of frame f
+		starts at position f + 3 * j of the sequence.
+		'''
+		return [self.translate_bytes(sequence[frame:]) for frame in range(3)]
+
+	def translate(self, rna):
+		'''
+		Translate an RNA (or DNA) string into an amino acid string, stopping at
+		the first stop codon, same as translate_to_protein.
+
+		>>> from bio_algorithms.tables import create_codon_dictionary_from_file
+		>>> table = CodonTable(create_codon_dictionary_from_file())
+		>>> table.translate('AUGUAANNN')
+		'M'
+		>>> table.translate('AUN')
+		Traceback (most recent call last):
+		...
+		ValueError: Not a valid codon: 'AUN'
+		>>> table.translate_bytes(b'AUNANAGCNNAAAUG')
+		b'????M'
+		'''
+		sequence = rna.encode('ascii')
+		(protein, stopped) = self._until_stop(sequence, self.translate_bytes(sequence))
+		return protein.decode('ascii')
+
+	def translate_chunks(self, chunks):
+		'''
+		Translate an RNA (or DNA) sequence given as an iterable of bytes chunks
+		and yield the amino acid string of each chunk, stopping at the first stop
+		codon. The nucleotides left over after the last complete codon of a chunk
+		are carried into the next one, so the codon phase is kept across chunks.
+		'''
+		leftover = b''
+		for chunk in chunks:
+			chunk = leftover + chunk
+			complete = len(chunk) - len(chunk) % 3
+			leftover = chunk[complete:]
+			(protein, stopped) = self._until_stop(chunk, self.translate_bytes(chunk[:complete]))
+			yield protein.decode('ascii')
+			if stopped:
+				return
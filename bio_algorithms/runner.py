@@ -0,0 +1,113 @@
+'''
+Long-lived runner that solves a manifest of jobs in one process.
+
+	python -m bio_algorithms.runner manifest.txt
+	python -m bio_algorithms.runner - < manifest.txt
+
+Every line of the manifest is a job: a problem id, an input file and
+optionally an output file (the output is printed if it is missing).
+Empty lines and lines starting with '#' are skipped. Relative paths are
+relative to the manifest file. For example:
+
+	1.1 1.1.Frequent_Words_Problem/dataset_2_4.txt
+	2.3 2.3.Generating_Theoretical_Spectrum_Problem/dataset_20_3.txt spectrum.txt
+
+The codon and mass tables are read once when the runner starts and the
+solution scripts are imported once, the first time a job needs them.
+'''
+
+import sys
+import os
+import importlib.util
+
+from .tables import RNA_CODON_TABLE_FILE, INTEGER_MASS_TABLE_FILE
+from .tables import AminoAcidsMassTable, create_codon_dictionary_from_file
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Problem id: (directory, script, table passed to its solve function)
+PROBLEMS = {
+	'1.1': ('1.1.Frequent_Words_Problem', 'frequent_words_counter.py', None),
+	'1.2': ('1.2.Reverse_Complement_Problem', 'reverse_complement.py', None),
+	'1.3': ('1.3.Pattern_Matching_Problem', 'pattern_match.py', None),
+	'1.4': ('1.4.Clump_Finding_Problem', 'clump_finder.py', None),
+	'1.5': ('1.5.Minimum_Skew_Problem', 'minimum_skew.py', None),
+	'1.6': ('1.6.Approximate_Pattern_Matching_Problem', 'approximate_pattern_match.py', None),
+	'1.7': ('1.7.Frequent_Words_with_Mismatches_Problem', 'frequent_words_with_mismatches.py', None),
+	'1.8': ('1.8.Frequent_Words_with_Mismatches_and_Reverse_Complements_Problem', 'frequent_words_with_mismatches_and_reverse_complement.py', None),
+	'2.1': ('2.1.Protein_Translation_Problem', 'protein_translator.py', 'codon_dictionary'),
+	'2.2': ('2.2.Peptide_Encoding_Problem', 'find_pattern_encoding_for_peptide.py', 'codon_dictionary'),
+	'2.3': ('2.3.Generating_Theoretical_Spectrum_Problem', 'theoretical_spectrum.py', 'mass_dictionary'),
+	'2.4': ('2.4.Cyclopeptide_Sequencing', 'cyclopeptide_sequencing.py', 'aa_mass_table'),
+	'2.5': ('2.5.Leaderboard_Cyclopeptide_Sequencing', 'leaderboard_cyclopeptide_sequencing.py', 'aa_mass_table'),
+}
+
+class BatchRunner:
+	'''
+	Solves jobs one after the other, sharing the tables and the imported
+	solution modules between them.
+	'''
+	
+	def __init__(self, codon_table_file=RNA_CODON_TABLE_FILE, mass_table_file=INTEGER_MASS_TABLE_FILE):
+		aa_mass_table = AminoAcidsMassTable(mass_table_file)
+		self.tables = {
+			'codon_dictionary': create_codon_dictionary_from_file(codon_table_file),
+			'aa_mass_table': aa_mass_table,
+			'mass_dictionary': aa_mass_table.mass_dic,
+		}
+		self.modules = {}
+	
+	def module(self, problem_id):
+		'''
+		Return the solution module of a problem, importing it the first time.
+		'''
+		if problem_id not in PROBLEMS:
+			raise ValueError("Unknown problem id: " + problem_id)
+		if problem_id not in self.modules:
+			(directory, script, table) = PROBLEMS[problem_id]
+			path = os.path.join(ROOT_DIR, directory, script)
+			spec = importlib.util.spec_from_file_location('problem_' + problem_id.replace('.', '_'), path)
+			module = importlib.util.module_from_spec(spec)
+			spec.loader.exec_module(module)
+			self.modules[problem_id] = module
+		return self.modules[problem_id]
+	
+	def solve(self, problem_id, input_file):
+		'''
+		Solve one job and return its output text.
+		'''
+		module = self.module(problem_id)
+		table = PROBLEMS[problem_id][2]
+		if table is None:
+			return module.solve(input_file)
+		return module.solve(input_file, self.tables[table])
+	
+	def run_manifest(self, lines, base_dir='.', out=sys.stdout):
+		'''
+		Solve every job of the manifest lines in order.
+		'''
+		for line in lines:
+			line = line.strip()
+			if not line or line.startswith('#'):
+				continue
+			fields = line.split()
+			problem_id = fields[0]
+			input_file = os.path.join(base_dir, fields[1])
+			output = self.solve(problem_id, input_file)
+			if len(fields) > 2:
+				with open(os.path.join(base_dir, fields[2]), 'w') as f:
+					f.write(output + '\n')
+			else:
+				out.write(output + '\n')
+				out.flush()
+
+def main(argv):
+	runner = BatchRunner()
+	if argv[1] == '-':
+		runner.run_manifest(sys.stdin)
+	else:
+		with open(argv[1]) as f:
+			runner.run_manifest(f, os.path.dirname(argv[1]))
+
+if __name__ == '__main__':
+	main(sys.argv)
@@ -0,0 +1,336 @@
+'''
+Theoretical spectra of peptides, given as lists of amino acid masses, and
+the Spectrum and Peptide classes of the cyclopeptide sequencing solutions.
+
+The mass of every subpeptide is the difference of two prefix masses, so a
+spectrum takes O(n^2) subtractions once the n + 1 prefix masses are known.
+The subtractions for all the subpeptides of one length are done by a single
+map over two slices of the prefix masses.
+'''
+
+import itertools
+import operator
+from array import array
+
+def prefix_masses(masses):
+	'''
+	Return the masses of all the prefixes of a peptide, from the empty one to the whole peptide.
+	'''
+	return list(itertools.accumulate(masses, initial=0))
+
+def _cyclic_subpeptide_masses(prefix, spectrum):
+	'''
+	Append to spectrum the masses of the cyclic subpeptides of every length
+	from 1 to n - 1, starting at every position of the peptide with the given prefix masses.
+	'''
+	n = len(prefix) - 1
+	# Prefix masses of the peptide read twice, so wrapping subpeptides are differences too
+	total = prefix[-1]
+	prefix = list(prefix)
+	prefix.extend([total + mass for mass in prefix[1:]])
+	for width in range(1, n):
+		spectrum.extend(map(operator.sub, prefix[width:width+n], prefix[:n]))
+	return spectrum
+
+def _linear_subpeptide_masses(prefix, spectrum):
+	'''
+	Append to spectrum the masses of the linear subpeptides of every length
+	from 1 to n of the peptide with the given prefix masses.
+	'''
+	n = len(prefix) - 1
+	for width in range(1, n + 1):
+		spectrum.extend(map(operator.sub, prefix[width:], prefix[:n-width+1]))
+	return spectrum
+
+def cyclic_spectrum_of_prefix_masses(prefix):
+	'''
+	Return the sorted theoretical spectrum of a cyclic peptide given its prefix masses.
+	'''
+	spectrum = _cyclic_subpeptide_masses(prefix, [0, prefix[-1]])
+	spectrum.sort()
+	return spectrum
+
+def linear_spectrum_of_prefix_masses(prefix):
+	'''
+	Return the sorted theoretical spectrum of a linear peptide given its prefix masses.
+	'''
+	spectrum = _linear_subpeptide_masses(prefix, [0])
+	spectrum.sort()
+	return spectrum
+
+def cyclic_spectrum(masses):
+	'''
+	Return the sorted theoretical spectrum of a cyclic peptide: 0, the mass of
+	the peptide and the masses of its n * (n - 1) cyclic subpeptides.
+	'''
+	return cyclic_spectrum_of_prefix_masses(prefix_masses(masses))
+
+def linear_spectrum(masses):
+	'''
+	Return the sorted theoretical spectrum of a linear peptide: 0 and the
+	masses of its n * (n + 1) / 2 subpeptides.
+	'''
+	return linear_spectrum_of_prefix_masses(prefix_masses(masses))
+
+def cyclic_spectrum_array(masses, typecode='q'):
+	'''
+	Same as cyclic_spectrum, but returns the spectrum as a compact integer array.
+	The masses are computed and sorted in a temporary list, which is dropped
+	once copied, so only the returned spectrum is compact.
+	'''
+	return array(typecode, cyclic_spectrum(masses))
+
+def linear_spectrum_array(masses, typecode='q'):
+	'''
+	Same as linear_spectrum, but returns the spectrum as a compact integer array.
+	The masses are computed and sorted in a temporary list, which is dropped
+	once copied, so only the returned spectrum is compact.
+	'''
+	return array(typecode, linear_spectrum(masses))
+
+def cyclic_spectrum_scores(prefix_masses_list, spectrum):
+	'''
+	Score a batch of peptides, given by an iterable of their prefix masses, against a spectrum.
+	The score of a peptide is the number of masses of its cyclic spectrum that
+	are in the spectrum, counting a mass at most as many times as it appears in
+	the spectrum. Returns the scores as an integer array.
+	
+	The count array of the spectrum is built once for the whole batch. The
+	masses of every peptide are computed from its prefix masses and sorted in
+	one list, with no Spectrum or subpeptide objects, and matched against the
+	count array in a single pass.
+	'''
+	counts = spectrum.counts()
+	scores = array('L')
+	for prefix in prefix_masses_list:
+		masses = _cyclic_subpeptide_masses(prefix, [0, prefix[-1]])
+		masses.sort()
+		scores.append(_shared_peak_count(masses, counts))
+	return scores
+
+def _shared_peak_count(masses, counts):
+	'''
+	Return the number of masses of a sorted list that are in a spectrum, given
+	as its count array, counting a mass at most as many times as it is in the spectrum.
+	'''
+	limit = len(counts)
+	shared = 0
+	previous = -1
+	run = 0 # Number of times the current mass has been seen so far
+	for mass in masses:
+		run = run + 1 if mass == previous else 1
+		previous = mass
+		if mass < limit and counts[mass] >= run:
+			shared += 1
+	return shared
+
+class Spectrum:
+	'''
+	A class that represents a mass spectrum: a sorted multiset of integer masses.
+
+	The number of times each mass appears is kept in a count array indexed by
+	mass, built the first time another spectrum is compared against this one.
+	Its size is bounded by the parent mass. Comparisons walk the sorted masses
+	of the compared spectrum once and allocate nothing.
+	'''
+	
+	def __init__(self, masses):
+		self.masses = sorted(masses)
+		self.stored_parent_mass = None
+		self.stored_counts = None
+	
+	def parent_mass(self):
+		'''
+		Return the maximum mass as the parent mass of the spectrum
+		'''
+		if self.stored_parent_mass is None:
+			self.stored_parent_mass = self.masses[-1] if self.masses else 0
+		return self.stored_parent_mass
+	
+	def counts(self):
+		'''
+		Return an array with the number of times every mass, from 0 to the
+		parent mass, appears in the spectrum.
+		'''
+		if self.stored_counts is None:
+			counts = array('L', bytes(array('L').itemsize * (self.parent_mass() + 1)))
+			for mass in self.masses:
+				counts[mass] += 1
+			self.stored_counts = counts
+		return self.stored_counts
+	
+	def is_identical_to(self, comparing_spectrum):
+		'''
+		Check if the spectrum is identical to another one.
+		Both mass lists are sorted, so they are compared item by item.
+		'''
+		return self.masses == comparing_spectrum.masses
+	
+	def is_consistent_with(self, comparing_spectrum):
+		'''
+		Check if the spectrum is consistent with a reference one.
+		To be consistent, all its masses must be in the reference spectrum,
+		at least as many times as they are in this spectrum.
+		'''
+		counts = comparing_spectrum.counts()
+		limit = len(counts)
+		previous = -1
+		run = 0 # Number of times the current mass has been seen so far
+		for mass in self.masses:
+			run = run + 1 if mass == previous else 1
+			previous = mass
+			if mass >= limit or counts[mass] < run:
+				return False
+		return True
+	
+	def shared_peak_count(self, comparing_spectrum):
+		'''
+		Return the number of masses shared with a reference spectrum, counting
+		a mass as many times as it appears in both spectra.
+		'''
+		return _shared_peak_count(self.masses, comparing_spectrum.counts())
+
+class Peptide:
+	'''
+	A class that represents a peptide.
+	
+	The masses of the peptide are kept as the array of its prefix masses, so the
+	total mass and the mass of any subpeptide are differences of two items.
+	A peptide expanded by one amino acid shares the prefix masses array of its
+	parent and only keeps its own last prefix mass. Its full array is built
+	the first time it is needed, e.g. when the peptide is expanded in turn,
+	so all the children of a peptide share one array.
+	'''
+	
+	__slots__ = ('aa_seq', 'aa_list', 'prefix_masses', 'parent_prefix_masses', 'last_prefix_mass', 'stored_score')
+	
+	def __init__(self, aa_seq=None, aa_list=None, mass_list=None, prefix_masses=None):
+		self.aa_seq = aa_seq
+		self.aa_list = aa_list
+		self.prefix_masses = prefix_masses
+		self.parent_prefix_masses = None
+		self.last_prefix_mass = None
+		self.stored_score = None
+		
+		if self.aa_seq is not None and self.aa_list is None:
+			self.aa_list = list(self.aa_seq)
+		if self.prefix_masses is None and mass_list is not None:
+			self.prefix_masses = array('q', itertools.accumulate(mass_list, initial=0))
+	
+	@property
+	def mass_list(self):
+		'''
+		The masses of the amino acids of the peptide
+		'''
+		if self.prefix_masses is None and self.parent_prefix_masses is None:
+			return None
+		prefix_masses = self.prefix_mass_list()
+		return list(map(operator.sub, prefix_masses[1:], prefix_masses[:-1]))
+	
+	def expanded(self, aa_mass):
+		'''
+		Return a new peptide with the masses of this one followed by aa_mass.
+		The new peptide refers to the prefix masses array of this one instead of copying it.
+		'''
+		prefix_masses = self._prefix_masses()
+		pep = Peptide()
+		pep.parent_prefix_masses = prefix_masses
+		pep.last_prefix_mass = prefix_masses[-1] + aa_mass
+		return pep
+	
+	def prefix_mass_list(self):
+		'''
+		Return the prefix masses of the peptide as a new list, without building
+		the prefix masses array of an expanded peptide.
+		'''
+		if self.prefix_masses is None and self.parent_prefix_masses is not None:
+			prefix_masses = self.parent_prefix_masses.tolist()
+			prefix_masses.append(self.last_prefix_mass)
+			return prefix_masses
+		return self._prefix_masses().tolist()
+	
+	def theoretical_cyclospectrum(self, aa_mass_table=None):
+		'''
+		Calculate the theoretical spectrum of a peptide given a table
+		with the amino acid masses. Theoretical spectrum is the list
+		of the total masses of all the cyclic subpeptides.
+		'''
+		return Spectrum(cyclic_spectrum_of_prefix_masses(self._prefix_masses(aa_mass_table)))
+	
+	def theoretical_linearspectrum(self, aa_mass_table=None):
+		'''
+		Calculate the theoretical spectrum of a peptide given a table
+		with the amino acid masses. Theoretical spectrum is the list
+		of the total masses of all the linear subpeptides.
+		'''
+		prefix_masses = self._prefix_masses(aa_mass_table)
+		if len(prefix_masses) == 1:
+			return Spectrum([0, 0])
+		return Spectrum(linear_spectrum_of_prefix_masses(prefix_masses))
+	
+	def total_mass(self, aa_mass_table=None):
+		'''
+		Calculate the total theoretical mass of a peptide given a table
+		with the amino acid masses
+		'''
+		if self.prefix_masses is None and self.parent_prefix_masses is not None:
+			return self.last_prefix_mass
+		return self._prefix_masses(aa_mass_table)[-1]
+	
+	def subpeptide_mass(self, from_pos, width):
+		'''
+		Return the mass of the part of the peptide from 'from_pos' with length 'width'.
+		If the part goes past the end of the peptide, it continues from the peptide start.
+		'''
+		prefix_mass = self._prefix_mass
+		n = len(self)
+		if from_pos + width <= n:
+			return prefix_mass(from_pos+width) - prefix_mass(from_pos)
+		return prefix_mass(n) - prefix_mass(from_pos) + prefix_mass(from_pos+width-n)
+	
+	def create_mass_list_from_aa_mass_table(self, aa_mass_table):
+		'''
+		Create the prefix masses of the peptide, given a table with the
+		amino acid masses
+		'''
+		if self.prefix_masses is None:
+			masses = [aa_mass_table.mass_for_amino_acid(aa) for aa in self.aa_list]
+			self.prefix_masses = array('q', itertools.accumulate(masses, initial=0))
+	
+	def _prefix_mass(self, i):
+		if self.prefix_masses is None and self.parent_prefix_masses is not None:
+			if i < len(self.parent_prefix_masses):
+				return self.parent_prefix_masses[i]
+			return self.last_prefix_mass
+		return self._prefix_masses()[i]
+	
+	def _prefix_masses(self, aa_mass_table=None):
+		if self.prefix_masses is None and self.parent_prefix_masses is not None:
+			# Build the array of an expanded peptide, and let go of the parent's
+			self.prefix_masses = self.parent_prefix_masses + array('q', [self.last_prefix_mass])
+			self.parent_prefix_masses = None
+		if aa_mass_table is not None:
+			self.create_mass_list_from_aa_mass_table(aa_mass_table)
+		if self.prefix_masses is None:
+			raise ValueError("The masses of the peptide are not known")
+		return self.prefix_masses
+	
+	def score(self, spectrum):
+		'''
+		Get the score of the peptide by comparing its spectrum to a reference one.
+		The score is defined as the number of matching masses between the two spectra
+		'''
+		if self.stored_score is None:
+			self.stored_score = cyclic_spectrum_scores([self.prefix_mass_list()], spectrum)[0]
+			
+		return self.stored_score
+	
+	def __len__(self):
+		if self.aa_seq is not None:
+			return len(self.aa_seq)
+		if self.aa_list is not None:
+			return len(self.aa_list)
+		if self.prefix_masses is not None:
+			return len(self.prefix_masses) - 1
+		if self.parent_prefix_masses is not None:
+			return len(self.parent_prefix_masses)
@@ -0,0 +1,27 @@
+'''
+Suffix arrays of bytes texts.
+'''
+
+def build_suffix_array(text):
+	"""
+	Build the suffix array of a bytes text by prefix doubling. The suffixes are
+	first ranked by their first character; every round sorts them by the pair
+	of ranks (rank of the suffix, rank of the suffix h characters later), which
+	ranks them by their first 2h characters. Stops as soon as all ranks differ.
+	"""
+	n = len(text)
+	suffix_array = sorted(range(n), key=text.__getitem__)
+	rank = [0] * n
+	for i in range(1, n):
+		rank[suffix_array[i]] = rank[suffix_array[i-1]] + (text[suffix_array[i]] != text[suffix_array[i-1]])
+
+	h = 1
+	while rank[suffix_array[-1]] < n - 1:
+		# Rank 0 is reserved for suffixes that end before the second half
+		key = [rank[i] * (n + 1) + (rank[i+h] + 1 if i + h < n else 0) for i in range(n)]
+		suffix_array.sort(key=key.__getitem__)
+		for i in range(1, n):
+			rank[suffix_array[i]] = rank[suffix_array[i-1]] + (key[suffix_array[i]] != key[suffix_array[i-1]])
+		h *= 2
+
+	return suffix_array
@@ -0,0 +1,68 @@
+'''
+Parsers for the codon and amino acid mass tables in the data directory.
+'''
+
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+RNA_CODON_TABLE_FILE = os.path.join(DATA_DIR, 'RNA_codon_table_1.txt')
+INTEGER_MASS_TABLE_FILE = os.path.join(DATA_DIR, 'integer_mass_table.txt')
+
+def create_codon_dictionary_from_file(filename=RNA_CODON_TABLE_FILE):
+	'''
+	Read a codon table file and return a dictionary from codon to amino acid.
+	Stop codons are mapped to "stop". Every codon is added both in its RNA
+	and in its DNA (U replaced by T) form.
+	'''
+	codon_dictionary = {}
+	with open(filename) as f:
+		for line in f:
+			if " \n" in line:
+				triplet = line.strip()
+				codon_dictionary[triplet] = "stop"
+				triplet = triplet.replace("U", "T")
+				codon_dictionary[triplet] = "stop"
+			else:
+				(triplet, aa) = line.strip().split(" ")
+				codon_dictionary[triplet] = aa
+				triplet = triplet.replace("U", "T")
+				codon_dictionary[triplet] = aa
+	return codon_dictionary
+
+def create_mass_dictionary_from_file(filename=INTEGER_MASS_TABLE_FILE):
+	'''
+	Reads a space delimited file with amino acid masses and returns
+	a dictionary with the masses.
+	'''
+	mass_dictionary = {}
+	with open(filename) as f:
+		for line in f:
+			(aa, mass) = line.strip().split(" ")
+			mass_dictionary[aa] = int(mass)
+	return mass_dictionary
+
+class AminoAcidsMassTable:
+	'''
+	A class that serves as a wrapper for the amino acid mass table
+	'''
+	
+	def __init__(self, mass_table_file=INTEGER_MASS_TABLE_FILE):
+		self.mass_dic = create_mass_dictionary_from_file(mass_table_file)
+	
+	def mass_for_amino_acid(self, aa):
+		'''
+		Return the mass for the requested amino acid
+		'''
+		return self.mass_dic[aa]
+		
+	def masses(self):
+		'''
+		Returns all unique masses for all amino acids
+		'''
+		return sorted(list(set(self.mass_dic.values())))
+	
+	def amino_acids(self):
+		'''
+		Returns all amino acids
+		'''
+		return sorted(self.mass_dic.keys())